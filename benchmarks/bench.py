@@ -0,0 +1,294 @@
+"""
+Benchmark headless di Fort Wars (la GUI disegna sul driver video SDL 'dummy').
+
+    python benchmarks/bench.py --out bench.json
+    python benchmarks/bench.py --sizes 18 64 --baseline benchmarks/baseline.json
+
+Ogni misura è il tempo per operazione in secondi (migliore e mediana su --repeat
+ripetizioni), con chiave '<gruppo>.<nome>/n=<n>'. Con --baseline i risultati vengono
+confrontati con un JSON salvato in precedenza: un tempo migliore più lento del baseline oltre
+--tolerance è una regressione e il comando esce con codice 1.
+"""
+import argparse, datetime, json, os, platform, statistics, sys, tempfile, time
+from typing import Callable, Dict, List, Optional
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from terrain import generate_terrain
+from game import GameState, COST_FORT
+from save_load import save_game, load_game
+
+SIZES = (18, 64, 256, 1024)
+GROUPS = ('terrain', 'rollout', 'game', 'save_load', 'gui', 'bot', 'vec')
+ROLLOUT_STEPS = 2000  # azioni massime per rollout: sulle mappe grandi la partita non finisce
+VEC_CELLS = 1 << 24  # celle totali del batch di VecGameState (B=1024 a n=128, meno sopra)
+
+def measure(fn: Callable, setup: Optional[Callable] = None, repeat: int = 5,
+            number: int = 1) -> Dict:
+    """
+    Chiama fn(ctx) `number` volte per ripetizione, con ctx = setup() fuori dal tempo.
+    Se fn ritorna un int è il numero di operazioni eseguite (altrimenti 1): il tempo è per operazione.
+    """
+    samples = []
+    ops = 0
+    for _ in range(repeat):
+        ctx = setup() if setup is not None else None
+        ops = 0
+        start = time.perf_counter()
+        for _ in range(number):
+            done = fn(ctx)
+            ops += done if isinstance(done, int) else 1
+        samples.append((time.perf_counter() - start) / ops)
+    return {'best': min(samples), 'median': statistics.median(samples), 'ops': ops,
+            'repeat': repeat}
+
+def populated_state(n: int, k: int = 2, density: float = 1 / 40, seed: int = 0) -> GameState:
+    """Partita a metà: circa density*n*n forti piazzati a caso, alternando i giocatori."""
+    gs = GameState(generate_terrain(n, seed=seed), k=k)
+    for p in (0, 1):
+        gs.set_credits(p, COST_FORT * n * n)
+    target = max(1, int(n * n * density))
+    for cell in np.random.default_rng(seed).permutation(n * n).tolist():
+        if len(gs.forts) >= target:
+            break
+        gs.place_fort(gs.current_player, *divmod(cell, n))
+    return gs
+
+def _rollout(ctx) -> int:
+    """Partita casuale: le caselle si provano in ordine casuale, si passa senza crediti."""
+    gs, cells = ctx
+    n = gs.n
+    steps = 0
+    while steps < ROLLOUT_STEPS and not gs.is_over():
+        p = gs.current_player
+        placed = False
+        while gs.credits[p] >= COST_FORT and cells:
+            if gs.place_fort(p, *divmod(cells.pop(), n)):
+                placed = True
+                break
+        if not placed:
+            gs.pass_turn(p)
+        steps += 1
+    return steps
+
+def bench_terrain(n: int, repeat: int) -> Dict[str, Dict]:
+    return {'generate': measure(lambda _: generate_terrain(n, seed=0), repeat=repeat)}
+
+def bench_rollout(n: int, repeat: int) -> Dict[str, Dict]:
+    terrain = generate_terrain(n, seed=0)
+    rng = np.random.default_rng(1)
+
+    def setup():
+        return GameState(terrain, k=2), rng.permutation(n * n).tolist()
+    return {'random': measure(_rollout, setup, repeat=repeat)}
+
+def bench_game(n: int, repeat: int) -> Dict[str, Dict]:
+    gs = populated_state(n)
+    calls = 2000
+    cells = np.random.default_rng(2).integers(0, n, size=(calls, 2)).tolist()
+
+    def loop(fn):
+        def run(_):
+            for _ in range(calls):
+                fn()
+            return calls
+        return run
+
+    def can_place(_):
+        p = gs.current_player
+        for x, y in cells:
+            gs.can_place(p, x, y)
+        return calls
+
+    def pass_turn(state):
+        for _ in range(calls):
+            state.pass_turn(state.current_player)
+        return calls
+
+    return {
+        'is_over': measure(loop(gs.is_over), repeat=repeat),
+        'any_valid_move': measure(loop(lambda: gs.any_valid_move(gs.current_player)), repeat=repeat),
+        'can_place': measure(can_place, repeat=repeat),
+        'pass_turn': measure(pass_turn, lambda: gs.clone(keep_undo=False), repeat=repeat),
+        'to_dict': measure(lambda _: gs.to_dict(), repeat=repeat),
+    }
+
+def bench_save_load(n: int, repeat: int) -> Dict[str, Dict]:
+    gs = populated_state(n)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for ext in ('json', 'fwb'):
+            path = os.path.join(tmp, f'bench.{ext}')
+
+            def roundtrip(_):
+                save_game(gs, path, index=False)
+                loaded = load_game(path)
+                np.asarray(loaded.terrain).sum()  # con mmap forza la lettura del terreno
+            results[ext] = measure(roundtrip, repeat=repeat)
+    return results
+
+def bench_gui(n: int, repeat: int) -> Dict[str, Dict]:
+    import pygame
+    from gui import FortWarsGUI
+    ts = max(2, 720 // n)
+    gui = FortWarsGUI(n=n, window=(n * ts, n * ts + 60), autostart=False)
+    gui.gs = populated_state(n)
+    gui.show_influence = True
+
+    def full(_):
+        # primo frame o resize: terreno, forti e sfondo da rifare
+        gui._terrain_key = gui._forts_key = gui._background_key = None
+        gui.draw()
+
+    def turn(_):
+        # dopo una mossa cambiano solo i forti
+        gui._forts_key = gui._background_key = None
+        gui.draw()
+
+    try:
+        return {'draw_full': measure(full, repeat=repeat),
+                'draw_turn': measure(turn, repeat=repeat),
+                'draw_idle': measure(lambda _: gui.draw(), repeat=repeat, number=100)}
+    finally:
+        pygame.quit()
+
+def bench_bot(n: int, repeat: int) -> Dict[str, Dict]:
+    from bot import HeuristicBot
+    gs = populated_state(n)
+    turns = 200
+
+    def play(ctx):
+        # una decisione del bot più il piazzamento: il bot aggiorna i valori attorno ai nuovi forti
+        state, bot, rng = ctx
+        for _ in range(turns):
+            move = bot(state, rng)
+            if move is None or not state.place_fort(state.current_player, *move):
+                state.pass_turn(state.current_player)
+        return turns
+
+    results = {}
+    for policy in ('greedy', 'softmax'):
+        def setup(policy=policy):
+            state, bot, rng = gs.clone(keep_undo=False), HeuristicBot(policy=policy), np.random.default_rng(0)
+            bot.sync(state)  # il ricalcolo completo iniziale non fa parte della misura
+            return state, bot, rng
+        results[policy] = measure(play, setup, repeat=repeat)
+    return results
+
+def bench_vec(n: int, repeat: int) -> Dict[str, Dict]:
+    """
+    Passi di partita al secondo con azioni casuali e auto-reset: VecGameState su B partite
+    contro lo stesso loop su GameState. Entrambi i tempi sono per singolo passo di una partita,
+    quindi il loro rapporto è lo speed-up del motore batch. 'step_bank' è VecGameState con
+    gli auto-reset pescati da un banco di B mappe (generato nel setup, fuori dal tempo).
+    """
+    from vec_game import VecGameState
+    B = max(1, min(1024, VEC_CELLS // (n * n)))
+    steps = 20
+
+    def vec_setup(bank=None):
+        return VecGameState(B, n, seed=0, terrain_bank=bank), np.random.default_rng(0)
+
+    def vec_steps(ctx):
+        vec, rng = ctx
+        for _ in range(steps):
+            vec.step(rng.integers(0, n * n + 1, size=B))
+        return steps * B
+
+    games = min(B, 64)
+
+    def scalar_setup():
+        seeds = np.random.default_rng(0)
+        return [GameState(generate_terrain(n, seed=i), k=2) for i in range(games)], seeds
+
+    def scalar_steps(ctx):
+        states, rng = ctx
+        for _ in range(steps):
+            for b, action in enumerate(rng.integers(0, n * n + 1, size=games).tolist()):
+                gs = states[b]
+                p = gs.current_player
+                if action == n * n or not gs.place_fort(p, *divmod(action, n)):
+                    gs.pass_turn(p)
+                if gs.is_over():
+                    states[b] = GameState(generate_terrain(n, seed=int(rng.integers(1 << 62))), k=2)
+        return steps * games
+
+    return {'step': measure(vec_steps, vec_setup, repeat=repeat),
+            'step_bank': measure(vec_steps, lambda: vec_setup(B), repeat=repeat),
+            'scalar_step': measure(scalar_steps, scalar_setup, repeat=repeat)}
+
+BENCHMARKS = {
+    'terrain': bench_terrain,
+    'rollout': bench_rollout,
+    'game': bench_game,
+    'save_load': bench_save_load,
+    'gui': bench_gui,
+    'bot': bench_bot,
+    'vec': bench_vec,
+}
+
+def run_benchmarks(sizes=SIZES, groups=GROUPS, repeat: int = 5, verbose: bool = False) -> Dict:
+    results = {}
+    for n in sizes:
+        for group in groups:
+            for name, res in BENCHMARKS[group](n, repeat).items():
+                key = f'{group}.{name}/n={n}'
+                results[key] = res
+                if verbose:
+                    print(f'{key:<32} {res["median"] * 1e3:12.4f} ms/op', file=sys.stderr)
+    return {
+        'meta': {
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+        },
+        'results': results,
+    }
+
+def compare(current: Dict, baseline: Dict, tolerance: float = 0.3) -> List[Dict]:
+    """
+    Confronto per chiave sui tempi migliori, meno rumorosi della mediana.
+    ratio > 1 + tolerance è una regressione. Il baseline vale solo sulla macchina che l'ha prodotto.
+    """
+    rows = []
+    for key, res in current['results'].items():
+        ref = baseline['results'].get(key)
+        if ref is None:
+            continue
+        ratio = res['best'] / ref['best'] if ref['best'] > 0 else float('inf')
+        rows.append({'key': key, 'baseline': ref['best'], 'current': res['best'],
+                     'ratio': ratio, 'regression': ratio > 1 + tolerance})
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Fort Wars')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES))
+    parser.add_argument('--groups', nargs='+', choices=GROUPS, default=list(GROUPS))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--out', type=str, help='file JSON dei risultati')
+    parser.add_argument('--baseline', type=str, help='JSON di riferimento da confrontare')
+    parser.add_argument('--tolerance', type=float, default=0.3,
+                        help='rallentamento relativo tollerato (0.3 = +30%%)')
+    args = parser.parse_args()
+    current = run_benchmarks(args.sizes, args.groups, args.repeat, verbose=True)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=1)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        rows = compare(current, baseline, args.tolerance)
+        for r in rows:
+            mark = '  REGRESSIONE' if r['regression'] else ''
+            print(f"{r['key']:<32} {r['baseline'] * 1e3:12.4f} -> {r['current'] * 1e3:12.4f} ms"
+                  f"  x{r['ratio']:.2f}{mark}")
+        if any(r['regression'] for r in rows):
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
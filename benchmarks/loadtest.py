@@ -0,0 +1,111 @@
+"""
+Load test di server.py: `--matches` partite contemporanee tra client casuali, rigiocate
+di continuo per `--duration` secondi; stampa mosse/s e partite/s sostenute.
+
+    python benchmarks/loadtest.py --matches 1000 --duration 20 --procs 4
+    python benchmarks/loadtest.py --connect 127.0.0.1:7777   # server già avviato
+
+Senza --connect il server parte in un processo separato su un socket Unix temporaneo.
+I client (che rigiocano ogni azione sulla loro copia della partita) costano quanto il
+server: con --procs si distribuiscono su più processi per saturarlo.
+Ogni partita usa due connessioni, una per giocatore: con migliaia di partite alzare `ulimit -n`.
+"""
+import argparse, asyncio, multiprocessing, os, shutil, sys, tempfile, time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from client import FortWarsClient
+from server import serve
+from tournament import AGENTS
+
+async def _player(connect, stats: dict, deadline: float, agent, n: int, k: int, seed: int):
+    client = await connect()
+    rng = np.random.default_rng(seed)
+    try:
+        while time.perf_counter() < deadline:
+            try:
+                # a fine test l'ultimo in coda potrebbe non trovare più un avversario
+                await asyncio.wait_for(client.join(n, k), deadline - time.perf_counter() + 1.0)
+            except asyncio.TimeoutError:
+                break
+            while await client.wait_turn():
+                move = agent(client.gs, rng)
+                if move is None:
+                    client.pass_turn()
+                else:
+                    client.place(*move)
+                await client.writer.drain()
+                stats['moves'] += 1
+            stats['games'] += 1
+            stats['timeouts'] += client.timeouts
+            client.timeouts = 0
+    finally:
+        await client.close()
+
+def _connector(address: str):
+    """'unix:/path' oppure 'host:porta'."""
+    if address.startswith('unix:'):
+        return lambda: FortWarsClient.connect_unix(address[5:])
+    host, _, port = address.rpartition(':')
+    return lambda: FortWarsClient.connect(host, int(port))
+
+async def run_load(address: str, matches: int, duration: float, n: int = 18, k: int = 2,
+                   agent: str = 'random') -> dict:
+    connect = _connector(address)
+    stats = {'moves': 0, 'games': 0, 'timeouts': 0}
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(_player(connect, stats, deadline, AGENTS[agent], n, k, i)
+                           for i in range(2 * matches)))
+    elapsed = time.perf_counter() - start
+    # ogni partita è contata da entrambi i giocatori
+    stats['games'] /= 2
+    stats['elapsed_s'] = elapsed
+    return stats
+
+def _run_process(address: str, matches: int, duration: float, n: int, k: int, agent: str) -> dict:
+    return asyncio.run(run_load(address, matches, duration, n, k, agent))
+
+def _serve(unix: str, timeout: float):
+    asyncio.run(serve(unix=unix, timeout=timeout))
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test del server Fort Wars')
+    parser.add_argument('--matches', type=int, default=500)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--n', type=int, default=18)
+    parser.add_argument('--k', type=int, default=2)
+    parser.add_argument('--agent', default='random', choices=list(AGENTS))
+    parser.add_argument('--timeout', type=float, default=5.0, help='timeout per mossa del server avviato qui')
+    parser.add_argument('--connect', type=str, default=None,
+                        help="server già avviato: host:porta oppure unix:/path")
+    parser.add_argument('--procs', type=int, default=1, help='processi client')
+    args = parser.parse_args()
+
+    server = tmp = None
+    address = args.connect
+    if address is None:
+        tmp = tempfile.mkdtemp()
+        path = os.path.join(tmp, 'fortwars.sock')
+        server = multiprocessing.Process(target=_serve, args=(path, args.timeout), daemon=True)
+        server.start()
+        while not os.path.exists(path):
+            time.sleep(0.01)
+        address = 'unix:' + path
+    per_proc = [args.matches // args.procs + (i < args.matches % args.procs) for i in range(args.procs)]
+    try:
+        with multiprocessing.Pool(args.procs) as pool:
+            parts = pool.starmap(_run_process, [(address, m, args.duration, args.n, args.k, args.agent)
+                                                for m in per_proc if m])
+    finally:
+        if server is not None:
+            server.terminate()
+            shutil.rmtree(tmp, ignore_errors=True)
+    elapsed = max(p['elapsed_s'] for p in parts)
+    moves = sum(p['moves'] for p in parts)
+    games = sum(p['games'] for p in parts)
+    print(f"{args.matches} partite contemporanee, {elapsed:.1f}s: {moves / elapsed:.0f} mosse/s, "
+          f"{games / elapsed:.1f} partite/s, {sum(p['timeouts'] for p in parts)} timeout")
+
+if __name__ == '__main__':
+    main()
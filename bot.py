@@ -0,0 +1,165 @@
+"""
+Avversario euristico vettoriale: valuta tutte le caselle in una volta con NumPy.
+
+Valore di una casella c per il giocatore p:
+
+    w_score  * h(c)**2                                punteggio immediato
+  + w_income * (production(c) + bonus di adiacenza)   rendita futura, anche la promozione
+                                                      dei propri forti adiacenti a c
+  + w_deny   * somma h**2 delle caselle libere nel    area sottratta all'avversario
+               disco di raggio k attorno a c           (regola del raggio k)
+
+Gli array di valori vengono tenuti aggiornati in modo incrementale: ogni nuovo forte
+cambia solo le caselle entro 2k da lui, quindi la decisione costa un aggiornamento
+locale per forte più un argmax sulla board (ben sotto il millisecondo a n=256).
+Un cambio di partita, un undo o uno stato clonato provocano un ricalcolo completo.
+
+    bot = HeuristicBot(policy='softmax', temperature=0.05)
+    move = bot(gs, rng)     # (x, y) oppure None = passa, come gli agenti di tournament.py
+"""
+from __future__ import annotations
+import weakref
+from typing import Optional, Tuple
+import numpy as np
+from game import GameState, COST_FORT, ADJACENT_BONUS, production_array
+
+POLICIES = ('greedy', 'softmax', 'epsilon')
+
+def _patch(arr: np.ndarray, x0: int, x1: int, y0: int, y1: int, m: int, fill) -> np.ndarray:
+    """arr[x0-m:x1+m, y0-m:y1+m] con i bordi fuori dalla board riempiti con `fill`."""
+    n = arr.shape[0]
+    if x0 >= m and y0 >= m and x1 + m <= n and y1 + m <= n:
+        return arr[x0 - m:x1 + m, y0 - m:y1 + m]  # finestra interna: vista senza copia
+    out = np.full((x1 - x0 + 2 * m, y1 - y0 + 2 * m), fill, dtype=arr.dtype)
+    a0, a1 = max(x0 - m, 0), min(x1 + m, n)
+    b0, b1 = max(y0 - m, 0), min(y1 + m, n)
+    out[a0 - x0 + m:a1 - x0 + m, b0 - y0 + m:b1 - y0 + m] = arr[a0:a1, b0:b1]
+    return out
+
+
+class HeuristicBot:
+    """
+    Agente (gs, rng) -> mossa. policy: 'greedy' (argmax), 'softmax' (campiona con
+    `temperature`; calcola un exp per ogni casella vicina al massimo, quindi è la più
+    lenta) o 'epsilon' (casella legale a caso con probabilità `epsilon`, altrimenti greedy).
+    Passa se non ha mosse o se il valore migliore è sotto `pass_value`. I pesi di default
+    lasciano dominare il punteggio: con i crediti iniziali standard le partite sono brevi.
+    """
+    def __init__(self, policy: str = 'greedy', temperature: float = 0.05, epsilon: float = 0.1,
+                 w_score: float = 1.0, w_income: float = 0.25 / COST_FORT, w_deny: float = 0.01,
+                 pass_value: float = 0.0):
+        if policy not in POLICIES:
+            raise ValueError(f'policy sconosciuta: {policy} (disponibili: {", ".join(POLICIES)})')
+        self.policy = policy
+        self.temperature = temperature
+        self.epsilon = epsilon
+        self.w_score = w_score
+        self.w_income = w_income
+        self.w_deny = w_deny
+        self.pass_value = pass_value
+        self._gs_ref = None
+        self._synced = 0  # forti di gs già riflessi nei valori
+        self._last = None  # (x, y) dell'ultimo forte sincronizzato, per riconoscere un undo
+
+    def __call__(self, gs: GameState, rng: np.random.Generator) -> Optional[Tuple[int, int]]:
+        p = gs.current_player
+        if not gs.any_valid_move(p):
+            return None
+        self.sync(gs)
+        values = self.values[p]
+        if self.policy == 'epsilon' and rng.random() < self.epsilon:
+            return self._random_cell(gs, rng)
+        if self.policy == 'softmax':
+            return self._sample(values, gs.n, rng)
+        cell = int(np.argmax(values))
+        if values.flat[cell] < self.pass_value:
+            return None
+        return divmod(cell, gs.n)
+
+    # ---------- Politiche -----------------------------------------------------
+    def _sample(self, values: np.ndarray, n: int, rng: np.random.Generator):
+        flat = values.ravel()
+        best = max(float(flat.max()), self.pass_value)
+        # oltre 20 temperature sotto il migliore il peso è < 1e-8: si campiona tra i restanti
+        cells = np.flatnonzero(flat > best - 20 * self.temperature)
+        weights = np.exp((flat[cells] - best) / self.temperature)
+        cumulative = np.cumsum(weights)
+        total = cumulative[-1] if len(cells) else 0.0
+        r = rng.random() * (total + np.exp((self.pass_value - best) / self.temperature))
+        if r >= total:
+            return None
+        return divmod(int(cells[np.searchsorted(cumulative, r, side='right')]), n)
+
+    @staticmethod
+    def _random_cell(gs: GameState, rng: np.random.Generator):
+        n = gs.n
+        for _ in range(32):  # a inizio partita quasi ogni casella è libera
+            x, y = divmod(int(rng.integers(n * n)), n)
+            if gs._free[x, y]:
+                return x, y
+        cells = np.flatnonzero(gs._free)
+        return divmod(int(cells[rng.integers(len(cells))]), n)
+
+    # ---------- Valori incrementali ------------------------------------------
+    def sync(self, gs: GameState):
+        """Porta self.values allo stato di gs: locale sui nuovi forti, completo altrimenti."""
+        forts = gs.forts
+        same = self._gs_ref is not None and self._gs_ref() is gs and len(forts) >= self._synced
+        if same and self._synced and self._fort(forts, self._synced - 1) != self._last:
+            same = False
+        if not same:
+            self._reset(gs)
+            return
+        r = max(2 * gs.k, 2)
+        for x, y in zip(forts.xs[self._synced:].tolist(), forts.ys[self._synced:].tolist()):
+            self._update(gs, max(x - r, 0), min(x + r + 1, gs.n), max(y - r, 0), min(y + r + 1, gs.n))
+        self._mark(gs)
+
+    def _reset(self, gs: GameState):
+        self._gs_ref = weakref.ref(gs)
+        terrain = np.asarray(gs.terrain, dtype=np.float32)
+        self._h2 = terrain * terrain
+        self._prod = production_array(terrain).astype(np.float32)
+        self._base = self.w_score * self._h2 + self.w_income * self._prod
+        # offset del disco senza la casella centrale, relativi all'angolo della finestra
+        self._ring = [(dx, dy) for dx, dy in zip(*np.nonzero(gs._disc)) if (dx, dy) != (gs.k, gs.k)]
+        self.values = np.empty((2, gs.n, gs.n), dtype=np.float32)
+        self._update(gs, 0, gs.n, 0, gs.n)
+        self._mark(gs)
+
+    def _mark(self, gs: GameState):
+        self._synced = len(gs.forts)
+        self._last = self._fort(gs.forts, self._synced - 1) if self._synced else None
+
+    @staticmethod
+    def _fort(forts, i: int) -> Tuple[int, int, int]:
+        return int(forts.players[i]), int(forts.xs[i]), int(forts.ys[i])
+
+    def _update(self, gs: GameState, x0: int, x1: int, y0: int, y1: int):
+        """Ricalcola i valori di entrambi i giocatori nella finestra [x0:x1, y0:y1]."""
+        k = gs.k
+        h, w = x1 - x0, y1 - y0
+
+        # h**2 delle caselle ancora libere nel disco: quello che l'avversario perde
+        weight = _patch(gs._free, x0, x1, y0, y1, k, False) * _patch(self._h2, x0, x1, y0, y1, k, 0.0)
+        denied = np.zeros((h, w), dtype=np.float32)
+        for dx, dy in self._ring:
+            denied += weight[dx:dx + h, dy:dy + w]
+
+        # forti entro 1 dalla finestra: strati (proprio forte di p, guadagno se promosso)
+        fort_at = _patch(gs._fort_at, x0, x1, y0, y1, 1, -1)
+        xs, ys = np.nonzero(fort_at >= 0)
+        idx = fort_at[xs, ys]
+        players = gs.forts.players[idx]
+        layers = np.zeros((4,) + fort_at.shape, dtype=np.float32)
+        layers[players, xs, ys] = 1.0
+        # un proprio forte vicino senza bonus lo ottiene piazzando accanto
+        layers[2 + players, xs, ys] = np.where(gs.forts.bonuses[idx], 0.0,
+                                               _patch(self._prod, x0, x1, y0, y1, 1, 0.0)[xs, ys])
+        around = (layers[:, :-2, 1:-1] + layers[:, 2:, 1:-1]
+                  + layers[:, 1:-1, :-2] + layers[:, 1:-1, 2:])
+
+        value = self._base[x0:x1, y0:y1] + self.w_deny * denied
+        value = value + (ADJACENT_BONUS - 1.0) * self.w_income * (
+            (around[:2] > 0) * self._prod[x0:x1, y0:y1] + around[2:])
+        self.values[:, x0:x1, y0:y1] = np.where(gs._free[x0:x1, y0:y1], value, -np.inf)
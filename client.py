@@ -0,0 +1,110 @@
+"""
+Client asyncio per server.py. Tiene una copia locale della partita, aggiornata con le
+azioni contenute negli STATE del server, su cui l'agente decide senza altri round trip.
+
+    client = await FortWarsClient.connect('127.0.0.1', 7777)
+    result = await client.play(greedy_agent, n=18)
+"""
+from __future__ import annotations
+import asyncio
+from typing import Callable, Dict, Optional
+import numpy as np
+import protocol as P
+from game import GameState
+
+
+class FortWarsClient:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.gs: Optional[GameState] = None
+        self.player = -1
+        self.match = -1
+        self.timeout = 0.0
+        self.result: Optional[Dict] = None
+        self.timeouts = 0
+        self.rejected = 0
+
+    @classmethod
+    async def connect(cls, host: str = '127.0.0.1', port: int = 7777) -> 'FortWarsClient':
+        return cls(*await asyncio.open_connection(host, port))
+
+    @classmethod
+    async def connect_unix(cls, path: str) -> 'FortWarsClient':
+        return cls(*await asyncio.open_unix_connection(path))
+
+    async def close(self):
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    async def join(self, n: int = 18, k: int = 2, seed: int = -1) -> GameState:
+        """Entra in coda e attende l'avversario; ritorna la copia locale della partita."""
+        self.writer.write(P.encode_join(n, k, seed))
+        await self.writer.drain()
+        while True:
+            msg = P.decode(await P.read_message(self.reader))
+            if msg[0] == P.START:
+                _, self.match, self.player, n, k, timeout_ms, terrain = msg
+                self.timeout = timeout_ms / 1000
+                self.gs = GameState(terrain, k=k)
+                self.result = None
+                return self.gs
+            if msg[0] == P.REJECT and msg[1] == P.BAD_MESSAGE:
+                raise ValueError('JOIN rifiutato dal server')
+
+    def _apply(self, turn: int, current: int, credits, scores, actions: np.ndarray):
+        gs = self.gs
+        for player, kind, x, y in actions.tolist():
+            if kind == P.ACTION_PASS:
+                gs.pass_turn(player)
+            elif not gs.place_fort(player, x, y):
+                raise RuntimeError(f'azione non riproducibile dal server: {(player, x, y)}')
+        if current == P.NO_TURN:  # STATE finale: il giocatore di turno non conta più
+            current = gs.current_player
+        if (gs.turn_count, gs.current_player, gs.credits, gs.scores) != (turn, current, credits, scores):
+            raise RuntimeError('stato locale diverso da quello del server')
+
+    async def wait_turn(self) -> bool:
+        """Legge fino al proprio turno (True) o alla fine della partita (False, vedi result)."""
+        while True:
+            msg = P.decode(await P.read_message(self.reader))
+            kind = msg[0]
+            if kind == P.STATE:
+                self._apply(*msg[1:])
+                if msg[2] == self.player:  # mai nello STATE finale (NO_TURN)
+                    return True
+            elif kind == P.END:
+                _, winner, reason = msg
+                self.result = {'winner': winner, 'reason': reason, 'player': self.player,
+                               'scores': list(self.gs.scores), 'turn_count': self.gs.turn_count}
+                return False
+            elif kind == P.REJECT:
+                if msg[1] == P.TIMEOUT:
+                    self.timeouts += 1
+                elif msg[1] == P.INVALID:
+                    self.rejected += 1
+                    return True  # tocca ancora a noi
+
+    def place(self, x: int, y: int):
+        self.writer.write(P.encode_place(self.gs.turn_count, x, y))
+
+    def pass_turn(self):
+        self.writer.write(P.encode_pass(self.gs.turn_count))
+
+    async def play(self, agent: Callable[[GameState, np.random.Generator], Optional[tuple]],
+                   n: int = 18, k: int = 2, seed: int = -1,
+                   rng: np.random.Generator | None = None) -> Dict:
+        """Gioca una partita con un agente di tournament.AGENTS; ritorna il risultato."""
+        rng = rng if rng is not None else np.random.default_rng()
+        await self.join(n, k, seed)
+        while await self.wait_turn():
+            move = agent(self.gs, rng)
+            if move is None:
+                self.pass_turn()
+            else:
+                self.place(*move)
+            await self.writer.drain()
+        return self.result
@@ -0,0 +1,189 @@
+"""
+Dataset di traiettorie per il training, scritto in shard append-only.
+
+    root/
+      meta.json          versione e dtype dei record
+      index.bin          un record GAME_DTYPE per partita (accesso O(1) alla partita i)
+      shard_00000.bin    per ogni partita: terreno float32 n*n, poi i record STEP_DTYPE
+      shard_00001.bin    ...
+
+Un nuovo shard viene aperto quando il corrente supererebbe `max_shard_bytes`.
+Il record di indice viene scritto dopo i dati, quindi un crash non lascia mai
+l'indice puntare a dati incompleti. Un solo writer per directory.
+"""
+from __future__ import annotations
+import json, os
+from pathlib import Path
+from typing import Dict, Iterator, Tuple, Union
+import numpy as np
+from game import GameState
+from replay import Replay
+
+VERSION = 1
+# stato prima dell'azione, azione (x*n+y oppure n*n = pass) e punteggio guadagnato
+STEP_DTYPE = np.dtype([
+    ('turn', '<i4'), ('player', 'u1'), ('action', '<i4'), ('reward', '<f4'),
+    ('credits', '<i8', 2), ('income', '<i8', 2), ('scores', '<f8', 2),
+    ('free_cells', '<i4'), ('forts', '<i4'),
+])
+GAME_DTYPE = np.dtype([
+    ('shard', '<u4'), ('terrain_offset', '<u8'), ('steps_offset', '<u8'),
+    ('n', '<u4'), ('k', '<u4'), ('n_steps', '<u8'), ('winner', 'i1'), ('scores', '<f8', 2),
+])
+INDEX_FILE = 'index.bin'
+META_FILE = 'meta.json'
+
+def _shard_name(i: int) -> str:
+    return f'shard_{i:05d}.bin'
+
+def trajectory(gs: GameState) -> np.ndarray:
+    """Record STEP_DTYPE di ogni azione di gs.history, rigiocata dallo stato iniziale."""
+    # niente keyframe: si va solo avanti
+    replay = Replay.from_game(gs, keyframe_interval=len(gs.history) + 1)
+    sim = replay.state
+    steps = np.empty(len(gs.history), dtype=STEP_DTYPE)
+    pass_action = sim.n * sim.n
+    for i, action in enumerate(gs.history):
+        rec = steps[i]
+        rec['turn'] = sim.turn_count
+        rec['player'] = action['player']
+        rec['credits'] = sim.credits
+        rec['income'] = (sim.income(0), sim.income(1))
+        rec['scores'] = sim.scores
+        rec['free_cells'] = sim._free_count
+        rec['forts'] = len(sim.forts)
+        replay.step()  # ValueError se l'azione non è valida
+        if action['type'] == 'place':
+            x, y = action['x'], action['y']
+            rec['action'] = x * sim.n + y
+            rec['reward'] = float(sim.terrain[x, y]) ** 2
+        else:
+            rec['action'] = pass_action
+            rec['reward'] = 0.0
+    return steps
+
+class TrajectoryWriter:
+    """Scrittore in streaming: add_game() accoda una partita allo shard corrente."""
+    def __init__(self, root: Union[str, os.PathLike], max_shard_bytes: int = 256 << 20):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_shard_bytes = max_shard_bytes
+        meta = self.root / META_FILE
+        if not meta.exists():
+            meta.write_text(json.dumps({'version': VERSION, 'step_dtype': STEP_DTYPE.descr,
+                                        'game_dtype': GAME_DTYPE.descr}))
+        index_path = self.root / INDEX_FILE
+        # riprende un dataset esistente: scarta un eventuale record di indice incompleto
+        size = index_path.stat().st_size if index_path.exists() else 0
+        self.n_games = size // GAME_DTYPE.itemsize
+        self._index = open(index_path, 'ab')
+        self._index.truncate(self.n_games * GAME_DTYPE.itemsize)
+        last = np.fromfile(index_path, dtype=GAME_DTYPE, count=1,
+                           offset=(self.n_games - 1) * GAME_DTYPE.itemsize) if self.n_games else None
+        self.shard = int(last['shard'][0]) if last is not None else 0
+        self._open_shard()
+
+    def _open_shard(self):
+        self._shard = open(self.root / _shard_name(self.shard), 'ab')
+        self._shard_size = self._shard.seek(0, os.SEEK_END)
+
+    def add_game(self, gs: GameState) -> int:
+        """Scrive terreno e traiettoria di `gs`; ritorna l'indice della partita."""
+        terrain = np.ascontiguousarray(gs.terrain, dtype='<f4')
+        steps = trajectory(gs)
+        size = -(-terrain.nbytes // 8) * 8 + -(-steps.nbytes // 8) * 8
+        if self._shard_size and self._shard_size + size > self.max_shard_bytes:
+            self._shard.close()
+            self.shard += 1
+            self._open_shard()
+        # dati troncati da un crash precedente restano orfani: si riparte dalla fine del file
+        start = -(-self._shard_size // 8) * 8
+        self._shard.write(b'\0' * (start - self._shard_size))
+        self._shard.write(terrain.tobytes())
+        steps_offset = start + -(-terrain.nbytes // 8) * 8
+        self._shard.write(b'\0' * (steps_offset - start - terrain.nbytes))
+        self._shard.write(steps.tobytes())
+        self._shard.flush()
+        self._shard_size = steps_offset + steps.nbytes
+
+        record = np.zeros(1, dtype=GAME_DTYPE)
+        winner = gs.winner()
+        record[0] = (self.shard, start, steps_offset, gs.n, gs.k, len(steps),
+                     -2 if winner is None else winner, gs.scores)
+        self._index.write(record.tobytes())
+        self._index.flush()
+        self.n_games += 1
+        return self.n_games - 1
+
+    def close(self):
+        self._shard.close()
+        self._index.close()
+
+    def __enter__(self) -> 'TrajectoryWriter':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TrajectoryDataset:
+    """Lettore: accesso O(1) alla partita i e mini-batch lazy via memory mapping."""
+    def __init__(self, root: Union[str, os.PathLike]):
+        self.root = Path(root)
+        index_path = self.root / INDEX_FILE
+        count = index_path.stat().st_size // GAME_DTYPE.itemsize
+        self.index = np.memmap(index_path, dtype=GAME_DTYPE, mode='r', shape=(count,)) \
+            if count else np.empty(0, dtype=GAME_DTYPE)
+        self._shards: Dict[int, np.memmap] = {}
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def _shard(self, i: int) -> np.memmap:
+        shard = self._shards.get(i)
+        if shard is None:
+            shard = self._shards[i] = np.memmap(self.root / _shard_name(i), dtype=np.uint8, mode='r')
+        return shard
+
+    def game(self, i: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(terreno n x n, record STEP_DTYPE) della partita i, senza copie."""
+        rec = self.index[i]
+        data = self._shard(int(rec['shard']))
+        n, t0, s0 = int(rec['n']), int(rec['terrain_offset']), int(rec['steps_offset'])
+        terrain = data[t0:t0 + 4 * n * n].view('<f4').reshape(n, n)
+        steps = data[s0:s0 + STEP_DTYPE.itemsize * int(rec['n_steps'])].view(STEP_DTYPE)
+        return terrain, steps
+
+    def iter_batches(self, batch_size: int, shuffle: bool = True, seed: int | None = None,
+                     games_per_block: int = 64) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Mini-batch di passi come dict di array (campi di STEP_DTYPE più 'game').
+        Le partite vengono lette a blocchi di `games_per_block`; con shuffle si mescolano
+        l'ordine delle partite e i passi dentro ogni blocco. L'ultimo batch può essere più corto.
+        """
+        rng = np.random.default_rng(seed)
+        order = rng.permutation(len(self)) if shuffle else np.arange(len(self))
+        carry = None
+        for b in range(0, len(order), games_per_block):
+            games = order[b:b + games_per_block]
+            parts = [self.game(int(g))[1] for g in games]
+            steps = np.concatenate(parts) if parts else np.empty(0, dtype=STEP_DTYPE)
+            game_ids = np.repeat(games, [len(p) for p in parts])
+            if carry is not None:
+                steps = np.concatenate([carry[0], steps])
+                game_ids = np.concatenate([carry[1], game_ids])
+            if shuffle:
+                perm = rng.permutation(len(steps))
+                steps, game_ids = steps[perm], game_ids[perm]
+            full = len(steps) // batch_size * batch_size
+            for s in range(0, full, batch_size):
+                yield self._batch(steps[s:s + batch_size], game_ids[s:s + batch_size])
+            carry = (steps[full:], game_ids[full:])
+        if carry is not None and len(carry[0]):
+            yield self._batch(*carry)
+
+    @staticmethod
+    def _batch(steps: np.ndarray, game_ids: np.ndarray) -> Dict[str, np.ndarray]:
+        batch = {name: np.ascontiguousarray(steps[name]) for name in STEP_DTYPE.names}
+        batch['game'] = game_ids
+        return batch
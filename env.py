@@ -0,0 +1,75 @@
+from __future__ import annotations
+from typing import Dict, Tuple
+import numpy as np
+from terrain import generate_terrain
+from game import GameState
+
+# niente import di pygame qui: l'ambiente deve partire veloce sui nodi headless
+
+
+class FortWarsEnv:
+    """
+    Ambiente headless stile Gym attorno a GameState.
+    Azioni: indice di casella x*n+y oppure n*n per passare.
+    Osservazione (4, n, n) float32: terreno, forti propri, forti nemici, caselle libere,
+    sempre dal punto di vista del giocatore di turno. Il canale 'free' non guarda i
+    crediti: le mosse davvero legali sono quelle di action_mask() (free se il giocatore
+    ha almeno COST_FORT crediti, altrimenti nessuna).
+    Un piazzamento non valido viene trattato come un pass, come in VecGameState.
+    """
+    CHANNELS = ('terrain', 'own', 'enemy', 'free')
+
+    def __init__(self, n: int = 18, k: int = 2, smooth_steps: int = 4, max_turns: int | None = None):
+        self.n = n
+        self.k = k
+        self.smooth_steps = smooth_steps
+        self.max_turns = max_turns
+        self.n_actions = n * n + 1
+        self.pass_action = n * n
+        self.gs: GameState | None = None
+        # un buffer per punto di vista (own/enemy scambiati): a ogni step si
+        # aggiornano solo le caselle toccate, senza ricostruire l'osservazione
+        self._obs = np.zeros((2, len(self.CHANNELS), n, n), dtype=np.float32)
+        self._action_mask = np.zeros(self.n_actions, dtype=bool)
+
+    def reset(self, seed: int | None = None) -> np.ndarray:
+        terrain = generate_terrain(self.n, self.smooth_steps, seed=seed)
+        self.gs = GameState(terrain, k=self.k)
+        obs = self._obs
+        obs[:, 0] = terrain
+        obs[:, 1:3] = 0.0
+        obs[:, 3] = self.gs._free
+        return obs[self.gs.current_player]
+
+    def step(self, action: int) -> Tuple[np.ndarray, float, bool, Dict]:
+        """Ritorna (obs, reward, done, info). Reward = punteggio guadagnato da chi ha mosso."""
+        gs = self.gs
+        player = gs.current_player
+        placed = False
+        reward = 0.0
+        if 0 <= action < self.pass_action:
+            x, y = divmod(int(action), self.n)
+            placed = gs.place_fort(player, x, y)
+        if placed:
+            reward = float(gs.terrain[x, y]) ** 2
+            self._obs[player, 1, x, y] = 1.0
+            self._obs[1 - player, 2, x, y] = 1.0
+            window, disc = gs._disc_window(x, y)
+            for view in self._obs[:, 3]:
+                view[window][disc] = 0.0
+        else:
+            gs.pass_turn(player)
+        done = gs.is_over() or (self.max_turns is not None and gs.turn_count >= self.max_turns)
+        info = {
+            'player': player,
+            'valid': placed or action == self.pass_action,
+            'winner': gs.winner() if done else None,
+        }
+        return self._obs[gs.current_player], reward, done, info
+
+    def action_mask(self) -> np.ndarray:
+        """Azioni valide per il giocatore di turno; il buffer è riusato tra le chiamate."""
+        mask = self._action_mask
+        mask[:-1].reshape(self.n, self.n)[:] = self.gs.legal_mask(self.gs.current_player)
+        mask[-1] = True
+        return mask
@@ -0,0 +1,161 @@
+from __future__ import annotations
+from typing import Dict, Iterable, Iterator, List
+import numpy as np
+
+
+# record impacchettato di un forte, usato dal formato binario di save_load
+RECORD_DTYPE = np.dtype([('player', 'u1'), ('x', '<i4'), ('y', '<i4'),
+                         ('height', '<f8'), ('turn', '<i8')])
+
+
+class FortTable:
+    """
+    Forti memorizzati come colonne NumPy crescenti (struct-of-arrays) invece che
+    come lista di dict. Le colonne pubbliche (players, xs, ys, heights, turns) sono
+    viste sulla parte occupata; iterare o indicizzare restituisce i vecchi dict
+    {'player', 'x', 'y', 'height', 'turn'} per compatibilità con salvataggi e GUI.
+    La colonna `bonuses` (bonus di adiacenza) è derivata e non finisce nei dict.
+    """
+    __slots__ = ('_player', '_x', '_y', '_height', '_turn', '_bonus', '_size', '_by_player', '_count')
+    _COLUMNS = ('_player', '_x', '_y', '_height', '_turn', '_bonus')
+
+    def __init__(self, capacity: int = 64):
+        capacity = max(capacity, 1)
+        self._player = np.empty(capacity, dtype=np.int8)
+        self._x = np.empty(capacity, dtype=np.int32)
+        self._y = np.empty(capacity, dtype=np.int32)
+        self._height = np.empty(capacity, dtype=np.float64)
+        self._turn = np.empty(capacity, dtype=np.int64)
+        self._bonus = np.empty(capacity, dtype=bool)
+        self._size = 0
+        # indici dei forti di ciascun giocatore, in ordine di inserimento
+        self._by_player = [np.empty(capacity, dtype=np.int64) for _ in range(2)]
+        self._count = [0, 0]
+
+    # ----- Colonne -----------------------------------------------------------
+    @property
+    def players(self) -> np.ndarray:
+        return self._player[:self._size]
+
+    @property
+    def xs(self) -> np.ndarray:
+        return self._x[:self._size]
+
+    @property
+    def ys(self) -> np.ndarray:
+        return self._y[:self._size]
+
+    @property
+    def heights(self) -> np.ndarray:
+        return self._height[:self._size]
+
+    @property
+    def turns(self) -> np.ndarray:
+        return self._turn[:self._size]
+
+    @property
+    def bonuses(self) -> np.ndarray:
+        return self._bonus[:self._size]
+
+    def indices(self, player: int) -> np.ndarray:
+        """Indici dei forti di `player` (vista, non copia)."""
+        return self._by_player[player][:self._count[player]]
+
+    # ----- Modifica ------------------------------------------------------------
+    def append(self, player: int, x: int, y: int, height: float, turn: int, bonus: bool = False) -> int:
+        i = self._size
+        if i == len(self._x):
+            for name in self._COLUMNS:
+                setattr(self, name, self._grow(getattr(self, name)))
+        c = self._count[player]
+        if c == len(self._by_player[player]):
+            self._by_player[player] = self._grow(self._by_player[player])
+        self._player[i] = player
+        self._x[i] = x
+        self._y[i] = y
+        self._height[i] = height
+        self._turn[i] = turn
+        self._bonus[i] = bonus
+        self._by_player[player][c] = i
+        self._count[player] = c + 1
+        self._size = i + 1
+        return i
+
+    def pop(self) -> Dict:
+        """Rimuove l'ultimo forte inserito (usato da GameState.undo)."""
+        fort = self[-1]
+        self._size -= 1
+        self._count[fort['player']] -= 1
+        return fort
+
+    @staticmethod
+    def _grow(arr: np.ndarray) -> np.ndarray:
+        out = np.empty(max(2 * len(arr), 1), dtype=arr.dtype)
+        out[:len(arr)] = arr
+        return out
+
+    def copy(self) -> 'FortTable':
+        table = FortTable(self._size)
+        for name in self._COLUMNS:
+            getattr(table, name)[:self._size] = getattr(self, name)[:self._size]
+        for p in range(2):
+            c = self._count[p]
+            if c > len(table._by_player[p]):
+                table._by_player[p] = np.empty(c, dtype=np.int64)
+            table._by_player[p][:c] = self._by_player[p][:c]
+        table._count = self._count.copy()
+        table._size = self._size
+        return table
+
+    # ----- Compatibilità con la lista di dict --------------------------------
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, i: int) -> Dict:
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError(i)
+        return {'player': int(self._player[i]), 'x': int(self._x[i]), 'y': int(self._y[i]),
+                'height': float(self._height[i]), 'turn': int(self._turn[i])}
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self.to_list())
+
+    def to_list(self) -> List[Dict]:
+        cols = zip(self.players.tolist(), self.xs.tolist(), self.ys.tolist(),
+                   self.heights.tolist(), self.turns.tolist())
+        return [{'player': p, 'x': x, 'y': y, 'height': h, 'turn': t} for p, x, y, h, t in cols]
+
+    @classmethod
+    def from_list(cls, forts: Iterable[Dict]) -> 'FortTable':
+        forts = list(forts)
+        table = cls(len(forts))
+        for f in forts:
+            table.append(f['player'], f['x'], f['y'], f['height'], f['turn'])
+        return table
+
+    def to_records(self) -> np.ndarray:
+        records = np.empty(self._size, dtype=RECORD_DTYPE)
+        records['player'] = self.players
+        records['x'] = self.xs
+        records['y'] = self.ys
+        records['height'] = self.heights
+        records['turn'] = self.turns
+        return records
+
+    @classmethod
+    def from_records(cls, records: np.ndarray) -> 'FortTable':
+        size = len(records)
+        table = cls(size)
+        table._player[:size] = records['player']
+        table._x[:size] = records['x']
+        table._y[:size] = records['y']
+        table._height[:size] = records['height']
+        table._turn[:size] = records['turn']
+        table._bonus[:size] = False
+        for p in range(2):
+            table._by_player[p] = np.flatnonzero(table._player[:size] == p)
+            table._count[p] = len(table._by_player[p])
+        table._size = size
+        return table
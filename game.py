@@ -5,8 +5,41 @@ from copy import deepcopy
 from pathlib import Path
 from typing import List, Dict, Tuple
 import numpy as np
+from forts import FortTable
 
 COST_FORT = 800
+START_CREDITS = 2000
+WATER_LEVEL = 0.3  # sotto questa altezza la casella è acqua
+ADJACENT_BONUS = 1.5  # moltiplicatore di produzione con un proprio forte adiacente
+
+# ----- Zobrist ---------------------------------------------------------------
+# Chiavi a 64 bit ottenute con splitmix64 invece di una tabella n x n: nessuna
+# memoria per board grandi e le stesse chiavi per ogni GameState.
+CREDIT_BUCKETS = 16  # crediti nell'hash a gruppi di COST_FORT, saturati all'ultimo
+_M64 = (1 << 64) - 1
+
+def _splitmix64(z: int) -> int:
+    z = (z + 0x9E3779B97F4A7C15) & _M64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _M64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _M64
+    return z ^ (z >> 31)
+
+def _splitmix64_array(z: np.ndarray) -> np.ndarray:
+    """_splitmix64 su un array uint64 (l'overflow degli array NumPy è modulo 2**64)."""
+    z = z + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+def fort_key(player: int, x: int, y: int) -> int:
+    return _splitmix64((player << 40) | (x << 20) | y)
+
+SIDE_KEY = _splitmix64(1 << 62)  # presente quando tocca al giocatore 1
+CREDIT_KEYS = [[_splitmix64((1 << 61) | (p << 8) | b) for b in range(CREDIT_BUCKETS)] for p in (0, 1)]
+
+def production_array(heights: np.ndarray) -> np.ndarray:
+    """GameState.production su un array di altezze."""
+    return ((1.0 - heights) * 200).astype(np.int64)
 
 class GameState:
     """Logica principale del gioco"""
@@ -14,12 +47,121 @@ class GameState:
         self.terrain = terrain
         self.n = terrain.shape[0]
         self.k = k
-        self.forts: List[Dict] = []  # List[{'player': int, 'x': int, 'y': int, 'height': float, 'turn': int}]
-        self.credits = [2000, 2000]
+        self.forts = FortTable()  # colonne player, x, y, height, turn; itera come dict
+        self.credits = [START_CREDITS, START_CREDITS]
         self.scores = [0.0, 0.0]
         self.turn_count = 0
         self.current_player = 0  # 0 o 1
         self.history: List[Dict] = []  # azioni serializzate per replay
+        # maschera delle caselle ancora libere: niente acqua e fuori dal raggio k
+        # di ogni forte. Aggiornata a ogni place_fort, evita le scansioni di self.forts
+        self._disc = self._make_disc(k)
+        self._no_moves = None  # maschera vuota, allocata al primo uso
+        self._reset_mask()
+        self._income = [0, 0]  # crediti prodotti per turno, aggiornati da place_fort
+        # una voce per azione, consumata da undo(): ('place', player, score, free_count,
+        # window, patch della maschera, income, forti promossi) oppure
+        # ('pass', player, crediti prodotti)
+        self._undo: List[Tuple] = []
+        # hash Zobrist della posizione: forti, giocatore di turno e crediti a fasce.
+        # Aggiornato in place_fort/pass_turn/undo/set_credits: i crediti si cambiano a
+        # mano solo con set_credits, i forti solo con le azioni
+        self._reset_hash()
+
+    # ----- Maschera caselle libere ------------------------------------------
+    @staticmethod
+    def _make_disc(k: int) -> np.ndarray:
+        d = np.arange(-k, k + 1)
+        return d[:, None]**2 + d[None, :]**2 <= k**2
+
+    def _reset_mask(self):
+        """Ricostruisce maschera e indice spaziale dai forti correnti."""
+        self._free = ~(np.asarray(self.terrain) < WATER_LEVEL)
+        self._free_count = int(np.count_nonzero(self._free))
+        # indice spaziale a griglia uniforme (una cella per casella): indice del forte o -1
+        self._fort_at = np.full(self._free.shape, -1, dtype=np.int32)
+        self._fort_at[self.forts.xs, self.forts.ys] = np.arange(len(self.forts))
+        for x, y in zip(self.forts.xs.tolist(), self.forts.ys.tolist()):
+            self._stamp(x, y)
+
+    def _disc_window(self, x: int, y: int) -> Tuple[Tuple[slice, slice], np.ndarray]:
+        """Finestra della board coperta dal disco di raggio k e parte del disco corrispondente."""
+        k = self.k
+        x0, x1 = max(x - k, 0), min(x + k + 1, self.n)
+        y0, y1 = max(y - k, 0), min(y + k + 1, self.n)
+        disc = self._disc[x0 - x + k:x1 - x + k, y0 - y + k:y1 - y + k]
+        return (slice(x0, x1), slice(y0, y1)), disc
+
+    def _stamp(self, x: int, y: int):
+        window, disc = self._disc_window(x, y)
+        region = self._free[window]
+        self._free_count -= int(np.count_nonzero(region & disc))
+        region &= ~disc
+
+    def legal_mask(self, player: int) -> np.ndarray:
+        """Caselle dove `player` può piazzare ora. Vista in sola lettura, non copiata."""
+        if self.credits[player] < COST_FORT:
+            if self._no_moves is None:
+                self._no_moves = np.zeros_like(self._free)
+                self._no_moves.flags.writeable = False
+            return self._no_moves
+        view = self._free.view()
+        view.flags.writeable = False
+        return view
+
+    # ----- Hash Zobrist --------------------------------------------------------
+    def _credit_key(self, player: int) -> int:
+        return CREDIT_KEYS[player][min(self.credits[player] // COST_FORT, CREDIT_BUCKETS - 1)]
+
+    def set_credits(self, player: int, credits: int):
+        """Assegna i crediti di `player` (setup di test, benchmark, scenari) tenendo valido l'hash."""
+        old_key = self._credit_key(player)
+        self.credits[player] = credits
+        self.zobrist ^= old_key ^ self._credit_key(player)
+
+    def _reset_hash(self):
+        """Ricalcola l'hash da zero; gli aggiornamenti incrementali devono dare lo stesso valore."""
+        h = SIDE_KEY if self.current_player else 0
+        h ^= self._credit_key(0) ^ self._credit_key(1)
+        forts = self.forts
+        if len(forts):
+            z = ((forts.players.astype(np.uint64) << np.uint64(40))
+                 | (forts.xs.astype(np.uint64) << np.uint64(20)) | forts.ys.astype(np.uint64))
+            h ^= int(np.bitwise_xor.reduce(_splitmix64_array(z)))
+        self.zobrist = h
+
+    # ----- Indice spaziale ----------------------------------------------------
+    def forts_within(self, x: int, y: int, r: int) -> np.ndarray:
+        """Indici dei forti con distance2 <= r² da (x, y). Costa O(r²), non O(forti)."""
+        x0, x1 = max(x - r, 0), min(x + r + 1, self.n)
+        y0, y1 = max(y - r, 0), min(y + r + 1, self.n)
+        if x0 >= x1 or y0 >= y1:
+            return np.empty(0, dtype=np.int32)
+        window = self._fort_at[x0:x1, y0:y1]
+        wx, wy = np.nonzero(window >= 0)
+        near = (wx + x0 - x)**2 + (wy + y0 - y)**2 <= r * r
+        return window[wx[near], wy[near]]
+
+    def neighbours(self, i: int) -> np.ndarray:
+        """Forti dello stesso giocatore a distanza 1 dal forte i (quelli che danno il bonus)."""
+        forts = self.forts
+        idx = self.forts_within(int(forts.xs[i]), int(forts.ys[i]), 1)
+        return idx[(idx != i) & (forts.players[idx] == forts.players[i])]
+
+    def adjacent_pairs(self) -> np.ndarray:
+        """(P, 2) indici di coppie di forti dello stesso giocatore a distanza 1, ognuna una volta."""
+        forts = self.forts
+        xs, ys, players = forts.xs, forts.ys, forts.players
+        pairs = []
+        # guardando solo in basso e a destra ogni coppia compare una volta
+        for dx, dy in ((1, 0), (0, 1)):
+            nx, ny = xs + dx, ys + dy
+            inside = np.flatnonzero((nx < self.n) & (ny < self.n))
+            other = self._fort_at[nx[inside], ny[inside]]
+            i, j = inside[other >= 0], other[other >= 0]
+            same = players[i] == players[j]
+            pairs.append(np.stack([i[same], j[same]], axis=1))
+        return np.concatenate(pairs)
 
     # ----- Helpers ---------------------------------------------------------
     def distance2(self, x1, y1, x2, y2) -> int:
@@ -30,63 +172,136 @@ class GameState:
             return False
         if self.credits[player] < COST_FORT:
             return False
-        # altezza della casella - niente forti nell'acqua
-        if float(self.terrain[x, y]) < 0.3:
-            return False
-        # Check already occupied
-        for f in self.forts:
-            if f['x'] == x and f['y'] == y:
-                return False
-            if self.distance2(x, y, f['x'], f['y']) <= self.k**2:
-                return False
-        return True
+        # acqua, caselle occupate e raggio k dei forti sono già nella maschera
+        return bool(self._free[x, y])
 
     def production(self, height: float) -> int:
         """Return credits produced per turn based on fort height."""
         return int((1.0 - height) * 200)
 
-    def _adjacent_bonus(self, fort: Dict) -> float:
-        for other in self.forts:
-            if other is fort:
+    def _reset_income(self):
+        """Ricalcola bonus di adiacenza e produzione da zero (dopo from_dict)."""
+        self._income = [0, 0]
+        for player in (0, 1):
+            idx = self.forts.indices(player)
+            if not len(idx):
                 continue
-            if other['player'] == fort['player'] and self.distance2(fort['x'], fort['y'], other['x'], other['y']) <= 1:
-                return 1.5
-        return 1.0
+            bonus = self._adjacent_mask(player, idx)
+            self.forts.bonuses[idx] = bonus
+            prod = production_array(self.forts.heights[idx])
+            prod[bonus] = (prod[bonus] * ADJACENT_BONUS).astype(np.int64)
+            self._income[player] = int(prod.sum())
+
+    def income(self, player: int) -> int:
+        """Crediti che `player` riceve passando il turno."""
+        return self._income[player]
+
+    def _adjacent_mask(self, player: int, idx: np.ndarray) -> np.ndarray:
+        """Per ogni forte in `idx` (tutti di `player`), True se ha un proprio forte a distanza 1."""
+        xs, ys = self.forts.xs[idx], self.forts.ys[idx]
+        adj = np.zeros(len(idx), dtype=bool)
+        for dx, dy in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+            nx, ny = xs + dx, ys + dy
+            inside = (nx >= 0) & (nx < self.n) & (ny >= 0) & (ny < self.n)
+            other = self._fort_at[nx[inside], ny[inside]]
+            same = other >= 0
+            same[same] = self.forts.players[other[same]] == player
+            adj[inside] |= same
+        return adj
+
+    def _adjacent_bonus(self, i: int) -> float:
+        """Moltiplicatore di produzione del forte di indice `i`."""
+        return ADJACENT_BONUS if self.forts.bonuses[i] else 1.0
 
     def place_fort(self, player: int, x: int, y: int) -> bool:
         if not self.can_place(player, x, y):
             return False
         h = float(self.terrain[x, y])
-        self.credits[player] -= COST_FORT
+        window, _ = self._disc_window(x, y)
+        # bonus di adiacenza: solo i 4 vicini possono cambiare
+        touching = self.forts_within(x, y, 1)
+        touching = touching[self.forts.players[touching] == player]
+        promoted = touching[~self.forts.bonuses[touching]]
+        self._undo.append(('place', player, self.scores[player], self._free_count,
+                           window, self._free[window].copy(), self._income[player], promoted))
+        self.set_credits(player, self.credits[player] - COST_FORT)
+        self.zobrist ^= fort_key(player, x, y)
         self.scores[player] += h ** 2
-        self.forts.append({'player': player, 'x': x, 'y': y, 'height': h, 'turn': self.turn_count})
+        for i in promoted.tolist():
+            prod = self.production(float(self.forts.heights[i]))
+            self._income[player] += int(prod * ADJACENT_BONUS) - prod
+        self.forts.bonuses[promoted] = True
+        bonus = len(touching) > 0
+        prod = self.production(h)
+        self._income[player] += int(prod * ADJACENT_BONUS) if bonus else prod
+        self._fort_at[x, y] = self.forts.append(player, x, y, h, self.turn_count, bonus)
+        self._stamp(x, y)
         self.history.append({'type': 'place', 'player': player, 'x': x, 'y': y})
         self._end_turn()
         return True
 
     def pass_turn(self, player: int):
         # produce crediti
-        for f in self.forts:
-            if f['player'] == player:
-                prod = self.production(f['height'])
-                prod = int(prod * self._adjacent_bonus(f))
-                self.credits[player] += prod
+        gained = self._income[player]
+        self._undo.append(('pass', player, gained))
+        self.set_credits(player, self.credits[player] + gained)
         self.history.append({'type': 'pass', 'player': player})
         self._end_turn()
 
     def _end_turn(self):
         self.turn_count += 1
         self.current_player = 1 - self.current_player
+        self.zobrist ^= SIDE_KEY
+
+    # ----- Ricerca: undo e copie leggere -----------------------------------
+    def undo(self) -> bool:
+        """Annulla l'ultima azione in O(k²). False se non c'è nulla da annullare
+        (lo stack parte vuoto anche per gli stati caricati con from_dict)."""
+        if not self._undo:
+            return False
+        entry = self._undo.pop()
+        self.history.pop()
+        self.turn_count -= 1
+        self.current_player = 1 - self.current_player
+        # l'hash si aggiorna all'indietro invece di ripristinarlo: resta giusto anche se
+        # nel frattempo i crediti sono stati cambiati con set_credits
+        self.zobrist ^= SIDE_KEY
+        if entry[0] == 'place':
+            _, player, score, free_count, window, patch, income, promoted = entry
+            fort = self.forts.pop()
+            self._fort_at[fort['x'], fort['y']] = -1
+            self.zobrist ^= fort_key(player, int(fort['x']), int(fort['y']))
+            self.forts.bonuses[promoted] = False
+            self._income[player] = income
+            self.set_credits(player, self.credits[player] + COST_FORT)
+            self.scores[player] = score
+            self._free[window] = patch
+            self._free_count = free_count
+        else:
+            _, player, gained = entry
+            self.set_credits(player, self.credits[player] - gained)
+        return True
+
+    def clone(self, keep_undo: bool = True) -> 'GameState':
+        """Copia indipendente che condivide il terreno (mai modificato) invece di copiarlo.
+        Con keep_undo=False la copia parte con lo stack di undo vuoto."""
+        gs = object.__new__(type(self))
+        gs.__dict__.update(self.__dict__)
+        # i dict di history e le voci di undo non vengono mai modificati
+        # dopo l'inserimento: bastano copie superficiali delle liste
+        gs.forts = self.forts.copy()
+        gs.history = self.history.copy()
+        gs._undo = self._undo.copy() if keep_undo else []
+        gs.credits = self.credits.copy()
+        gs.scores = self.scores.copy()
+        gs._income = self._income.copy()
+        gs._free = self._free.copy()
+        gs._fort_at = self._fort_at.copy()
+        return gs
 
     # --------- Fine partita -----------------------------------------------
     def any_valid_move(self, player: int) -> bool:
-        if self.credits[player] < COST_FORT:
-            return False
-        for x in range(self.n):
-            for y in range(self.n):
-                if self.can_place(player, x, y):
-                    return True
-        return False
+        return self.credits[player] >= COST_FORT and self._free_count > 0
 
     def is_over(self) -> bool:
         return not (self.any_valid_move(0) or self.any_valid_move(1))
@@ -105,7 +320,7 @@ class GameState:
         return {
             'terrain': self.terrain.tolist(),
             'k': self.k,
-            'forts': deepcopy(self.forts),
+            'forts': self.forts.to_list(),
             'credits': self.credits.copy(),
             'scores': self.scores.copy(),
             'turn_count': self.turn_count,
@@ -115,12 +330,16 @@ class GameState:
 
     @classmethod
     def from_dict(cls, data: Dict) -> 'GameState':
-        import numpy as np
-        gs = cls(np.array(data['terrain'], dtype=np.float32), k=data['k'])
-        gs.forts = data['forts']
+        # asanyarray: un terreno già float32 (es. np.memmap da un .fwb) non viene copiato
+        gs = cls(np.asanyarray(data['terrain'], dtype=np.float32), k=data['k'])
+        forts = data['forts']
+        gs.forts = forts if isinstance(forts, FortTable) else FortTable.from_list(forts)
         gs.credits = data['credits']
         gs.scores = data['scores']
         gs.turn_count = data['turn_count']
         gs.current_player = data['current_player']
         gs.history = data['history']
+        gs._reset_mask()
+        gs._reset_income()
+        gs._reset_hash()
         return gs
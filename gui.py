@@ -1,15 +1,19 @@
 
-import pygame, sys, os, math, json, argparse, glob, datetime
+import pygame, sys, os, math, json, argparse, glob, datetime, threading
 import numpy as np
 from typing import Tuple
 from terrain import generate_terrain
 from game import GameState, COST_FORT
-from save_load import save_game, load_game
+from save_load import save_game, load_game, read_index, rebuild_index, SAVE_PATTERNS
+from replay import Replay
+from bot import HeuristicBot, POLICIES
 
 TILE_SIZE = 30
 MARGIN = 2
 FONT_SIZE = 18
 CHECKBOX_SIZE = 20
+BOT_PLAYER = 1
+MENU_PAGE = 9  # salvataggi per pagina, scelti con i tasti 1-9
 INFO_BG = (250, 250, 250)
 INFO_FG = (10, 10, 10)
 
@@ -27,33 +31,54 @@ def height_color(h: float) -> Tuple[int, int, int]:
         t = (h - 0.6) / 0.4
         return (int(155 + 100*t), int(130 + 50*t), int(55))
 
+def height_colors(heights: np.ndarray) -> np.ndarray:
+    """height_color su un array di altezze: (..., 3) uint8 con gli stessi valori."""
+    h = heights.astype(np.float64)
+    rgb = np.empty(h.shape + (3,), dtype=np.float64)
+    low, mid, high = h < 0.3, (h >= 0.3) & (h < 0.6), h >= 0.6
+    t = h / 0.3
+    rgb[low] = np.stack([55*t, 100 + 100*t, 200 + 55*t], axis=-1)[low]
+    t = (h - 0.3) / 0.3
+    rgb[mid] = np.stack([55 + 100*t, 200 + 30*t, np.full_like(t, 55)], axis=-1)[mid]
+    t = (h - 0.6) / 0.4
+    rgb[high] = np.stack([155 + 100*t, 130 + 50*t, np.full_like(t, 55)], axis=-1)[high]
+    return rgb.astype(np.uint8)  # tronca come int()
+
 class FortWarsGUI:
-    def __init__(self, n=18, k=2, replay_path=None):
+    def __init__(self, n=18, k=2, replay_path=None, window=None, autostart=True, bot=None):
+        """window: dimensione iniziale (w, h); autostart=False non entra nei loop (benchmark, test).
+        bot: policy di HeuristicBot ('greedy', 'softmax', 'epsilon') che gioca come giocatore 1."""
         pygame.init()
         pygame.mixer.init()
         self.n = n
         self.k = k
         self.font = pygame.font.SysFont('consolas', FONT_SIZE)
         self.clock = pygame.time.Clock()
+        self.bot = HeuristicBot(policy=bot) if bot else None
+        self.bot_rng = np.random.default_rng()
         if replay_path:
-            self.replay_mode = True
-            self.gs = load_game(replay_path)
-            self.replay_actions = iter(self.gs.history)
-            self.paused = True
+            self.start_replay(load_game(replay_path))
         else:
             self.replay_mode = False
             terrain = generate_terrain(n)
             self.gs = GameState(terrain, k=k)
         self.show_influence = False
         self.tile_size = TILE_SIZE
-        self.surface = pygame.display.set_mode(
-            (n * self.tile_size, n * self.tile_size + 60), pygame.RESIZABLE
-        )
+        # cache di rendering, vedi draw()
+        self._terrain_key = self._forts_key = self._background_key = None
+        self._terrain_surf = self._forts_surf = self._background = None
+        self._tooltip = self._tooltip_rect = None
+        self._text_cache = {}
+        if window is None:
+            window = (self.n * self.tile_size, self.n * self.tile_size + 60)
+        self.surface = pygame.display.set_mode(window, pygame.RESIZABLE)
         self.offset_x = 0
         self.offset_y = 0
         self.update_layout()
         self.check_auto_pass()
         pygame.display.set_caption('Fort Wars')
+        if not autostart:
+            return
         if not replay_path:
             self.menu_loop()
         self.main_loop()
@@ -61,7 +86,8 @@ class FortWarsGUI:
     def update_layout(self, w=None, h=None):
         if w is None or h is None:
             w, h = self.surface.get_size()
-        self.tile_size = min(w // self.n, (h - 60) // self.n)
+        # almeno 1 pixel per casella: una board più grande della finestra esce dai bordi
+        self.tile_size = max(1, min(w // self.n, (h - 60) // self.n))
         self.offset_x = (w - self.n * self.tile_size) // 2
         self.offset_y = (h - 60 - self.n * self.tile_size) // 2
 
@@ -83,118 +109,182 @@ class FortWarsGUI:
         except Exception:
             pass
 
+    def human_turn(self) -> bool:
+        return not self.replay_mode and (self.bot is None or self.gs.current_player != BOT_PLAYER)
+
+    def bot_move(self):
+        """Una mossa del bot se tocca a lui (una per frame, così la board si vede aggiornata)."""
+        if self.bot is None or self.replay_mode or self.gs.current_player != BOT_PLAYER:
+            return
+        move = self.bot(self.gs, self.bot_rng)
+        if move is not None and self.gs.place_fort(BOT_PLAYER, *move):
+            self.play_place_sound()
+        else:
+            self.gs.pass_turn(BOT_PLAYER)
+            self.play_pass_sound()
+        self.check_auto_pass()
+
     def check_auto_pass(self):
         while not self.replay_mode and not self.gs.any_valid_move(self.gs.current_player):
             self.gs.pass_turn(self.gs.current_player)
 
     # ------------------------------------------------------------------
-    def draw(self):
-        surf = self.surface
-        surf.fill((0,0,0))
-        # Draw terrain
-        for x in range(self.n):
-            for y in range(self.n):
-                h = float(self.gs.terrain[x, y])
-                color = height_color(h)
-                rect = pygame.Rect(
-                    self.offset_x + y * self.tile_size,
-                    self.offset_y + x * self.tile_size,
-                    self.tile_size - MARGIN,
-                    self.tile_size - MARGIN,
-                )
-                pygame.draw.rect(surf, color, rect)
+    # Rendering a strati: terreno cotto in una Surface (rifatta solo al resize),
+    # forti/influenza in un layer rifatto solo quando cambiano i forti, e uno
+    # sfondo completo da cui si ripristinano le zone sporche (tooltip).
+    def terrain_surface(self) -> pygame.Surface:
+        key = (self.tile_size, id(self.gs.terrain))
+        if self._terrain_key != key:
+            ts = self.tile_size
+            colors = height_colors(np.asarray(self.gs.terrain))  # (n, n, 3) indicizzato [x, y]
+            # surfarray usa [colonna, riga] = [y, x]
+            pixels = np.repeat(np.repeat(colors.transpose(1, 0, 2), ts, axis=0), ts, axis=1)
+            if ts > 2 * MARGIN:  # con caselle minuscole la griglia coprirebbe tutto
+                gap = np.arange(self.n * ts) % ts >= ts - MARGIN
+                pixels[gap, :] = 0
+                pixels[:, gap] = 0
+            self._terrain_surf = pygame.surfarray.make_surface(pixels).convert()
+            self._terrain_key = key
+        return self._terrain_surf
+
+    def forts_layer(self) -> pygame.Surface:
+        gs = self.gs
+        # i forti cambiano solo in coda (piazzamento o undo): bastano quanti sono e l'ultimo
+        last = (int(gs.forts.xs[-1]), int(gs.forts.ys[-1])) if len(gs.forts) else None
+        key = (self.tile_size, id(gs), len(gs.forts), last, self.show_influence)
+        if self._forts_key == key:
+            return self._forts_surf
+        ts = self.tile_size
+        size = self.n * ts
+        layer = pygame.Surface((size, size), pygame.SRCALPHA)
+        forts = gs.forts
+        half = ts // 2
+        centers_x = (forts.ys * ts + half).tolist()
+        centers_y = (forts.xs * ts + half).tolist()
+        players = forts.players.tolist()
 
         # Influence
         if self.show_influence:
-            mask = pygame.Surface(
-                (self.n * self.tile_size, self.n * self.tile_size), pygame.SRCALPHA
-            )
-            for f in self.gs.forts:
-                cx = self.offset_x + f['y'] * self.tile_size + self.tile_size // 2
-                cy = self.offset_y + f['x'] * self.tile_size + self.tile_size // 2
-                color = (255,0,0,60) if f['player']==0 else (0,0,255,60)
-                pygame.draw.circle(mask, color, (cx, cy), self.gs.k * self.tile_size, 0)
-            surf.blit(mask, (0,0))
+            for cx, cy, p in zip(centers_x, centers_y, players):
+                color = (255,0,0,60) if p==0 else (0,0,255,60)
+                pygame.draw.circle(layer, color, (cx, cy), gs.k * ts, 0)
 
         # Draw forts
-        for f in self.gs.forts:
-            cx = self.offset_x + f['y'] * self.tile_size + self.tile_size // 2
-            cy = self.offset_y + f['x'] * self.tile_size + self.tile_size // 2
-            color = (255,0,0) if f['player']==0 else (0,0,255)
-            pygame.draw.circle(surf, (0,0,0), (cx, cy), self.tile_size // 2 - 2)
-            pygame.draw.circle(surf, color, (cx, cy), self.tile_size // 2 - 4)
-            # lines to adjacent forts of same player
-            for other in self.gs.forts:
-                if other is f or other['player'] != f['player']:
-                    continue
-                if self.gs.distance2(f['x'], f['y'], other['x'], other['y']) <= 1:
-                    ox = self.offset_x + other['y'] * self.tile_size + self.tile_size // 2
-                    oy = self.offset_y + other['x'] * self.tile_size + self.tile_size // 2
-                    pygame.draw.line(surf, color, (cx, cy), (ox, oy), 2)
+        for cx, cy, p in zip(centers_x, centers_y, players):
+            color = (255,0,0) if p==0 else (0,0,255)
+            pygame.draw.circle(layer, (0,0,0), (cx, cy), ts // 2 - 2)
+            pygame.draw.circle(layer, color, (cx, cy), ts // 2 - 4)
+        # lines to adjacent forts of same player
+        for i, j in gs.adjacent_pairs().tolist():
+            color = (255,0,0) if players[i]==0 else (0,0,255)
+            pygame.draw.line(layer, color, (centers_x[i], centers_y[i]), (centers_x[j], centers_y[j]), 2)
+        self._forts_surf = layer
+        self._forts_key = key
+        return layer
+
+    def render_text(self, text, color):
+        key = (text, color)
+        label = self._text_cache.get(key)
+        if label is None:
+            if len(self._text_cache) > 256:
+                self._text_cache.clear()
+            label = self._text_cache[key] = self.font.render(text, True, color)
+        return label
+
+    def refresh_background(self) -> bool:
+        """Ricompone lo sfondo se qualcosa di visibile è cambiato. True se l'ha rifatto."""
+        gs = self.gs
+        key = (self.surface.get_size(), self.tile_size, self.offset_x, self.offset_y,
+               id(gs), gs.turn_count, len(gs.forts), self.show_influence)
+        if self._background_key == key:
+            return False
+        bg = self._background
+        if bg is None or bg.get_size() != self.surface.get_size():
+            bg = self._background = pygame.Surface(self.surface.get_size()).convert()
+        bg.fill((0,0,0))
+        bg.blit(self.terrain_surface(), (self.offset_x, self.offset_y))
+        bg.blit(self.forts_layer(), (self.offset_x, self.offset_y))
 
         # Highlight current player
         border = pygame.Rect(self.offset_x, self.offset_y, self.n * self.tile_size, self.n * self.tile_size)
-        border_color = (255,0,0) if self.gs.current_player==0 else (0,0,255)
-        pygame.draw.rect(surf, border_color, border, 3)
+        border_color = (255,0,0) if gs.current_player==0 else (0,0,255)
+        pygame.draw.rect(bg, border_color, border, 3)
 
         # UI bar
         bar = pygame.Rect(self.offset_x, self.offset_y + self.n * self.tile_size, self.n * self.tile_size, 60)
-        pygame.draw.rect(surf, (40,40,40), bar)
+        pygame.draw.rect(bg, (40,40,40), bar)
         # Checkbox influence
         cb_rect = pygame.Rect(self.offset_x + 10, self.offset_y + self.n * self.tile_size + 20, CHECKBOX_SIZE, CHECKBOX_SIZE)
-        pygame.draw.rect(surf, (255,255,255), cb_rect, 2)
+        pygame.draw.rect(bg, (255,255,255), cb_rect, 2)
         if self.show_influence:
-            pygame.draw.line(surf, (255,255,255), cb_rect.topleft, cb_rect.bottomright, 2)
-            pygame.draw.line(surf, (255,255,255), cb_rect.topright, cb_rect.bottomleft, 2)
-        label = self.font.render('Mostra influenza (I)', True, (200,200,200))
-        surf.blit(label, (cb_rect.right + 8, cb_rect.top - 4))
+            pygame.draw.line(bg, (255,255,255), cb_rect.topleft, cb_rect.bottomright, 2)
+            pygame.draw.line(bg, (255,255,255), cb_rect.topright, cb_rect.bottomleft, 2)
+        label = self.render_text('Mostra influenza (I)', (200,200,200))
+        bg.blit(label, (cb_rect.right + 8, cb_rect.top - 4))
 
         # Credits + scores
-        txt = f'P0 Crediti: {self.gs.credits[0]:4d}  Score: {self.gs.scores[0]:.2f}   |   P1 Crediti: {self.gs.credits[1]:4d}  Score: {self.gs.scores[1]:.2f}'
-        info = self.font.render(txt, True, (220,220,220))
-        surf.blit(
+        txt = (f'P0 Crediti: {gs.credits[0]:4d} (+{gs.income(0)})  Score: {gs.scores[0]:.2f}   |   '
+               f'P1 Crediti: {gs.credits[1]:4d} (+{gs.income(1)})  Score: {gs.scores[1]:.2f}')
+        info = self.render_text(txt, (220,220,220))
+        bg.blit(
             info,
             (
                 self.offset_x + self.n * self.tile_size // 2 - info.get_width() // 2,
                 self.offset_y + self.n * self.tile_size + 2,
             ),
         )
+        self._background_key = key
+        return True
 
-        # Hover info
-        mx, my = pygame.mouse.get_pos()
+    def tooltip_lines(self, mx, my):
         grid_x = (my - self.offset_y) // self.tile_size
         grid_y = (mx - self.offset_x) // self.tile_size
-        hovered_height = None
-        if 0 <= grid_x < self.n and 0 <= grid_y < self.n:
-            hovered_height = float(self.gs.terrain[grid_x, grid_y])
-        for f in self.gs.forts:
-            if f['x'] == grid_x and f['y'] == grid_y:
-                prod = self.gs.production(f['height'])
-                if self.gs._adjacent_bonus(f) > 1.0:
-                    prod = int(prod * 1.5)
-                lines = [
-                    f"Player: {f['player']}",
-                    f"Coordinate: ({f['x']},{f['y']})",
-                    f"Height: {f['height']:.2f}",
-                    f"Prod/turn: {prod}",
-                ]
-                self.draw_tooltip(lines, mx, my)
-                break
-        else:
-            if hovered_height is not None:
-                prod = self.gs.production(hovered_height)
-                lines = [
-                    f"Coordinate: ({grid_x},{grid_y})",
-                    f"Height: {hovered_height:.2f}",
-                    f"Prod/turn: {prod}",
-                ]
-                self.draw_tooltip(lines, mx, my)
+        if not (0 <= grid_x < self.n and 0 <= grid_y < self.n):
+            return None
+        forts = self.gs.forts
+        hit = self.gs.forts_within(grid_x, grid_y, 0)
+        if len(hit):
+            i = int(hit[0])
+            f = forts[i]
+            prod = int(self.gs.production(f['height']) * self.gs._adjacent_bonus(i))
+            return (
+                f"Player: {f['player']}",
+                f"Coordinate: ({f['x']},{f['y']})",
+                f"Height: {f['height']:.2f}",
+                f"Prod/turn: {prod}",
+            )
+        h = float(self.gs.terrain[grid_x, grid_y])
+        return (
+            f"Coordinate: ({grid_x},{grid_y})",
+            f"Height: {h:.2f}",
+            f"Prod/turn: {self.gs.production(h)}",
+        )
 
-        pygame.display.flip()
+    def draw(self):
+        surf = self.surface
+        mx, my = pygame.mouse.get_pos()
+        lines = self.tooltip_lines(mx, my)
+        tooltip = (lines, mx, my)
+        dirty = []
+        if self.refresh_background():
+            surf.blit(self._background, (0, 0))
+            dirty.append(surf.get_rect())
+        elif tooltip != self._tooltip:
+            # ripristina solo la zona coperta dal tooltip precedente
+            if self._tooltip_rect is not None:
+                surf.blit(self._background, self._tooltip_rect, self._tooltip_rect)
+                dirty.append(self._tooltip_rect)
+        else:
+            return
+        self._tooltip = tooltip
+        self._tooltip_rect = self.draw_tooltip(lines, mx, my) if lines else None
+        if self._tooltip_rect is not None:
+            dirty.append(self._tooltip_rect)
+        pygame.display.update(dirty)
 
     def draw_tooltip(self, lines, mx, my):
         padding = 4
-        surfaces = [self.font.render(l, True, INFO_FG) for l in lines]
+        surfaces = [self.render_text(l, INFO_FG) for l in lines]
         width = max(s.get_width() for s in surfaces) + 2*padding
         height = sum(s.get_height() for s in surfaces) + 2*padding
         rect = pygame.Rect(mx, my - height, width, height)
@@ -204,41 +294,80 @@ class FortWarsGUI:
         for s in surfaces:
             self.surface.blit(s, (rect.left + padding, y))
             y += s.get_height()
+        return rect.clip(self.surface.get_rect())
 
     def menu_loop(self):
-        files = sorted(glob.glob('fortwars_*.json'))
-        running = True
-        while running:
-            self.surface.fill((0, 0, 0))
-            lines = ['N - Nuova partita'] + [f'{i+1} - {os.path.basename(f)}' for i, f in enumerate(files)]
-            for i, text in enumerate(lines):
-                label = self.font.render(text, True, (255, 255, 255))
-                self.surface.blit(label, (40, 40 + i * 30))
-            pygame.display.flip()
+        """Menu paginato dei salvataggi: legge solo l'indice e carica la partita scelta.
+        Ridisegna solo quando cambia qualcosa."""
+        entries = read_index('.')
+        page, message, dirty = 0, '', True
+        indexing = None
+        if not entries and any(glob.glob(p) for p in SAVE_PATTERNS):
+            # salvataggi fatti prima dell'indice: vanno letti tutti, in un thread
+            # così il menu resta usabile (N per una nuova partita)
+            indexing = threading.Thread(target=rebuild_index, args=('.',), daemon=True)
+            indexing.start()
+            message = 'Indicizzazione dei salvataggi... (python save_load.py --reindex .)'
+        pages = max(1, -(-len(entries) // MENU_PAGE))
+        while True:
+            if indexing is not None and not indexing.is_alive():
+                indexing = None
+                entries = read_index('.')
+                pages = max(1, -(-len(entries) // MENU_PAGE))
+                message = '' if entries else 'Indice non creato: python save_load.py --reindex .'
+                dirty = True
+            if dirty:
+                self.draw_menu(entries, page, pages, message)
+                dirty = False
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     pygame.quit(); sys.exit()
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
-                        pygame.quit(); sys.exit()
-                    if event.unicode.lower() == 'n':
-                        running = False
-                        break
-                    if event.unicode.isdigit():
-                        idx = int(event.unicode) - 1
-                        if 0 <= idx < len(files):
-                            self.replay_mode = True
-                            self.gs = load_game(files[idx])
-                            self.replay_actions = iter(self.gs.history)
-                            self.paused = True
-                            running = False
-                            break
+                if event.type == pygame.VIDEOEXPOSE:
+                    dirty = True
+                if event.type != pygame.KEYDOWN:
+                    continue
+                if event.key == pygame.K_ESCAPE:
+                    pygame.quit(); sys.exit()
+                if event.unicode.lower() == 'n':
+                    return
+                if event.key in (pygame.K_RIGHT, pygame.K_PAGEDOWN) and page < pages - 1:
+                    page, dirty = page + 1, True
+                elif event.key in (pygame.K_LEFT, pygame.K_PAGEUP) and page > 0:
+                    page, dirty = page - 1, True
+                elif event.unicode.isdigit() and event.unicode != '0':
+                    idx = page * MENU_PAGE + int(event.unicode) - 1
+                    if idx < len(entries):
+                        try:
+                            self.start_replay(load_game(entries[idx]['file']))
+                            return
+                        except (OSError, ValueError) as exc:
+                            message, dirty = f"{entries[idx]['file']}: {exc}", True
             self.clock.tick(30)
 
+    def menu_lines(self, entries, page, pages):
+        lines = [f'N - Nuova partita    <- -> pagina {page + 1}/{pages} ({len(entries)} salvataggi)']
+        for i, e in enumerate(entries[page * MENU_PAGE:(page + 1) * MENU_PAGE]):
+            winner = e['winner']
+            result = 'in corso' if winner is None else 'pareggio' if winner == -1 else f'vince P{winner}'
+            saved = e['saved'][5:16].replace('T', ' ')
+            lines.append(f"{i + 1} - {saved}  {e['n']}x{e['n']} k={e['k']}  turni {e['turn_count']}"
+                         f"  forti {e['forts']}  {result}")
+        return lines
+
+    def draw_menu(self, entries, page, pages, message=''):
+        self.surface.fill((0, 0, 0))
+        for i, text in enumerate(self.menu_lines(entries, page, pages)):
+            self.surface.blit(self.render_text(text, (255, 255, 255)), (40, 40 + i * 30))
+        if message:
+            self.surface.blit(self.render_text(message, (255, 120, 120)),
+                              (40, 40 + (MENU_PAGE + 2) * 30))
+        pygame.display.flip()
+
     # ------------------------------------------------------------------
     def main_loop(self):
         while True:
             self.handle_events()
+            self.bot_move()
             self.draw()
             self.clock.tick(30)
 
@@ -250,7 +379,7 @@ class FortWarsGUI:
             if event.type == pygame.VIDEORESIZE:
                 self.surface = pygame.display.set_mode((event.w, event.h), pygame.RESIZABLE)
                 self.update_layout(event.w, event.h)
-            if event.type == pygame.MOUSEBUTTONDOWN and not self.replay_mode:
+            if event.type == pygame.MOUSEBUTTONDOWN and self.human_turn():
                 mx, my = event.pos
                 if event.button == 1:
                     x = (my - self.offset_y) // self.tile_size
@@ -270,30 +399,46 @@ class FortWarsGUI:
                 if event.key == pygame.K_s and not self.replay_mode:
                     self.save_current_game()
                 if self.replay_mode:
-                    if event.key == pygame.K_SPACE:
-                        self.step_replay()
-                    if event.key == pygame.K_r:
-                        self.paused = not self.paused
-                else:
+                    self.handle_replay_key(event)
+                elif self.human_turn():
                     self.handle_game_key(event)
-        # Auto play replay if not paused
-        if self.replay_mode and not self.paused:
-            pygame.time.wait(300)
-            self.step_replay()
+        # Auto play replay: avanza in base al tempo trascorso, senza bloccare il loop
+        if self.replay_mode and self.replay.update(self.clock.get_time() / 1000.0):
+            self.gs = self.replay.state
 
-    def step_replay(self):
-        try:
-            action = next(self.replay_actions)
-        except StopIteration:
-            self.paused = True
-            return
-        if action['type']=='place':
-            self.gs.place_fort(action['player'], action['x'], action['y'])
-            # Undo forced role switch in original
-            self.gs.current_player = action['player']
-        else:
-            self.gs.pass_turn(action['player'])
-            self.gs.current_player = action['player']
+    def start_replay(self, saved: GameState):
+        self.replay_mode = True
+        self.replay = Replay.from_game(saved)
+        self.gs = self.replay.state
+        # la partita salvata può avere un'altra dimensione: griglia e layout seguono lei
+        self.n, self.k = saved.n, saved.k
+        if hasattr(self, 'surface'):
+            self.update_layout()
+
+    def handle_replay_key(self, event):
+        replay = self.replay
+        if event.key in (pygame.K_SPACE, pygame.K_RIGHT):
+            replay.step()
+        if event.key in (pygame.K_BACKSPACE, pygame.K_LEFT):
+            replay.step_back()
+        if event.key == pygame.K_r:
+            replay.toggle()
+        # velocità: + / - raddoppiano o dimezzano, B inverte la direzione
+        if event.unicode == '+':
+            replay.speed *= 2
+        if event.unicode == '-':
+            replay.speed /= 2
+        if event.key == pygame.K_b:
+            replay.speed = -replay.speed
+        if event.key == pygame.K_HOME:
+            replay.seek(0)
+        if event.key == pygame.K_END:
+            replay.seek(len(replay))
+        if event.key == pygame.K_PAGEUP:
+            replay.seek(replay.position - 100)
+        if event.key == pygame.K_PAGEDOWN:
+            replay.seek(replay.position + 100)
+        self.gs = replay.state
 
     def handle_game_key(self, event):
         if event.key == pygame.K_p:
@@ -311,7 +456,8 @@ class FortWarsGUI:
                 self.check_auto_pass()
 
     def save_current_game(self):
-        now = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        # microsecondi: due salvataggi nello stesso secondo non si sovrascrivono
+        now = datetime.datetime.now().strftime('%Y%m%d_%H%M%S_%f')
         filename = f'fortwars_{now}.json'
         save_path = os.path.join(os.getcwd(), filename)
         save_game(self.gs, save_path)
@@ -321,9 +467,10 @@ def main():
     parser = argparse.ArgumentParser(description='Fort Wars GUI')
     parser.add_argument('--n', type=int, default=18)
     parser.add_argument('--k', type=int, default=2)
-    parser.add_argument('--replay', type=str, help='Path JSON saved game')
+    parser.add_argument('--replay', type=str, help='Path saved game (.json o .fwb)')
+    parser.add_argument('--bot', choices=POLICIES, help='il giocatore 1 è il bot euristico')
     args = parser.parse_args()
-    FortWarsGUI(n=args.n, k=args.k, replay_path=args.replay)
+    FortWarsGUI(n=args.n, k=args.k, replay_path=args.replay, bot=args.bot)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,192 @@
+"""
+Strumentazione opzionale di GameState: chiamate e tempo per metodo.
+
+    with Profiler(interval=10):      # un riepilogo JSON su stderr ogni 10 s
+        run_training()
+
+    python profiling.py --n 64 --games 20 --interval 1   # partite headless profilate
+
+    prof = Profiler()
+    prof.enable(); ...; print(prof.summary()); prof.disable()
+
+Disabilitata non costa nulla: enable() sostituisce i metodi della classe con wrapper
+che misurano, disable() rimette gli originali. Il tempo è inclusivo (place_fort
+comprende la sua can_place). Un solo Profiler alla volta può essere attivo.
+"""
+from __future__ import annotations
+import argparse, functools, json, sys, threading, time
+from typing import Callable, Dict, Iterable, Optional, TextIO
+from game import GameState
+
+METHODS = (
+    'can_place', 'place_fort', 'pass_turn', 'any_valid_move', 'is_over', 'winner',
+    'legal_mask', 'income', 'forts_within', 'neighbours', 'adjacent_pairs',
+    '_adjacent_bonus', '_adjacent_mask', '_stamp', '_reset_mask', '_reset_income', '_reset_hash',
+    'undo', 'clone', 'to_dict', 'from_dict',
+)
+# statistiche derivate: metodo -> (nome, valore letto dallo stato dopo la chiamata)
+DERIVED: Dict[str, tuple] = {
+    'any_valid_move': ('free_cells', lambda gs: gs._free_count),
+    'can_place': ('free_cells', lambda gs: gs._free_count),
+    'place_fort': ('forts', lambda gs: len(gs.forts)),
+    'pass_turn': ('forts', lambda gs: len(gs.forts)),
+    'to_dict': ('forts', lambda gs: len(gs.forts)),
+}
+
+_active: Optional['Profiler'] = None
+
+
+class Profiler:
+    """Contatori per metodo di GameState; snapshot() e reset() sono sicuri anche da attivo."""
+    def __init__(self, methods: Iterable[str] = METHODS, interval: float | None = None,
+                 out: TextIO | None = None):
+        self.methods = tuple(methods)
+        self.interval = interval
+        self.out = out
+        self._stats: Dict[str, list] = {}
+        self._originals: Dict[str, object] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.reset()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._originals)
+
+    def reset(self):
+        # [chiamate, secondi, somma derivata, massimo derivato]; azzerati in place perché
+        # i wrapper già installati tengono un riferimento alle liste
+        for name in self.methods:
+            self._stats.setdefault(name, [0, 0.0, 0, 0])[:] = [0, 0.0, 0, 0]
+        self._started = time.perf_counter()
+
+    def _wrap(self, name: str, fn: Callable) -> Callable:
+        stat = self._stats[name]
+        derived = DERIVED.get(name)
+        clock = time.perf_counter
+
+        if derived is None:
+            @functools.wraps(fn)
+            def timed(*args, **kwargs):
+                t0 = clock()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    stat[1] += clock() - t0
+                    stat[0] += 1
+            return timed
+
+        read = derived[1]
+
+        @functools.wraps(fn)
+        def timed_derived(gs, *args, **kwargs):
+            t0 = clock()
+            try:
+                return fn(gs, *args, **kwargs)
+            finally:
+                stat[1] += clock() - t0
+                stat[0] += 1
+                value = read(gs)
+                stat[2] += value
+                if value > stat[3]:
+                    stat[3] = value
+        return timed_derived
+
+    def enable(self) -> 'Profiler':
+        global _active
+        if self.enabled:
+            return self
+        if _active is not None:
+            raise RuntimeError('un altro Profiler è già attivo')
+        _active = self
+        for name in self.methods:
+            raw = GameState.__dict__[name]
+            if isinstance(raw, classmethod):
+                wrapped = classmethod(self._wrap(name, raw.__func__))
+            elif isinstance(raw, staticmethod):
+                wrapped = staticmethod(self._wrap(name, raw.__func__))
+            else:
+                wrapped = self._wrap(name, raw)
+            self._originals[name] = raw
+            setattr(GameState, name, wrapped)
+        if self.interval:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._report_loop, daemon=True)
+            self._thread.start()
+        return self
+
+    def disable(self):
+        global _active
+        if not self.enabled:
+            return
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        for name, raw in self._originals.items():
+            setattr(GameState, name, raw)
+        self._originals.clear()
+        _active = None
+
+    def __enter__(self) -> 'Profiler':
+        return self.enable()
+
+    def __exit__(self, *exc):
+        self.disable()
+
+    # ---------- Lettura -------------------------------------------------------
+    def snapshot(self) -> Dict:
+        """Copia dei contatori: per metodo calls, total_s, mean_us e le derivate (media, max)."""
+        methods = {}
+        for name, (calls, total, dsum, dmax) in list(self._stats.items()):
+            if not calls:
+                continue
+            row = {'calls': calls, 'total_s': total, 'mean_us': total / calls * 1e6}
+            if name in DERIVED:
+                key = DERIVED[name][0]
+                row[f'{key}_mean'] = dsum / calls
+                row[f'{key}_max'] = dmax
+            methods[name] = row
+        return {'elapsed_s': time.perf_counter() - self._started, 'methods': methods}
+
+    def summary(self, top: int | None = None) -> str:
+        """Tabella testuale ordinata per tempo totale."""
+        snap = self.snapshot()
+        rows = sorted(snap['methods'].items(), key=lambda kv: -kv[1]['total_s'])[:top]
+        lines = [f"{'metodo':<18}{'chiamate':>12}{'totale s':>12}{'media us':>12}  derivate"]
+        for name, row in rows:
+            extra = '  '.join(f'{k}={v:.1f}' for k, v in row.items()
+                              if k not in ('calls', 'total_s', 'mean_us'))
+            lines.append(f"{name:<18}{row['calls']:>12}{row['total_s']:>12.4f}"
+                         f"{row['mean_us']:>12.2f}  {extra}")
+        lines.append(f"tempo trascorso: {snap['elapsed_s']:.2f} s")
+        return '\n'.join(lines)
+
+    def _report_loop(self):
+        while not self._stop.wait(self.interval):
+            out = self.out or sys.stderr
+            out.write(json.dumps(self.snapshot(), separators=(',', ':')) + '\n')
+            out.flush()
+
+
+def main():
+    from terrain import generate_terrain
+    from tournament import AGENTS, play_match
+    parser = argparse.ArgumentParser(description='Partite headless con profiling di GameState')
+    parser.add_argument('--agents', nargs=2, default=['random', 'greedy'], choices=list(AGENTS))
+    parser.add_argument('--n', type=int, default=18)
+    parser.add_argument('--k', type=int, default=2)
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-turns', type=int, default=10_000)
+    parser.add_argument('--interval', type=float, default=None, help='secondi tra due riepiloghi JSON')
+    parser.add_argument('--top', type=int, default=None)
+    args = parser.parse_args()
+    with Profiler(interval=args.interval) as prof:
+        for g in range(args.games):
+            terrain = generate_terrain(args.n, seed=args.seed + g)
+            play_match(terrain, args.k, tuple(args.agents), args.seed + g, args.max_turns)
+    print(prof.summary(args.top))
+
+if __name__ == '__main__':
+    main()
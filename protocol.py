@@ -0,0 +1,119 @@
+"""
+Protocollo binario compatto tra server.py e client.py.
+
+Ogni messaggio è un uint32 little-endian con la lunghezza del payload, poi il payload;
+il primo byte del payload è il tipo. Le azioni portano il turno a cui si riferiscono,
+così una mossa arrivata dopo il timeout viene scartata invece di finire nel turno dopo.
+
+    client -> server
+      JOIN    n:u16 k:u8 seed:i64 (-1 = casuale)
+      PLACE   turn:u32 x:u16 y:u16
+      PASS    turn:u32
+    server -> client
+      START   match:u32 player:u8 n:u16 k:u8 timeout_ms:u32, poi il terreno float32 n*n
+      STATE   turn:u32 current:u8 credits:2*i64 scores:2*f64 count:u32, poi count ACTION_DTYPE
+      REJECT  code:u8
+      END     winner:i8 reason:u8
+
+STATE non è un dump completo: porta solo le azioni avvenute dall'ultimo STATE inviato
+a quel giocatore (di solito la sua mossa e quella dell'avversario), e viene inviato
+quando tocca a lui o a fine partita. Il client le riapplica al suo GameState.
+Lo STATE di fine partita, subito prima di END, ha current = NO_TURN: non tocca a nessuno.
+"""
+import asyncio, struct
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+
+JOIN, PLACE, PASS = 1, 2, 3
+START, STATE, REJECT, END = 16, 17, 18, 19
+
+# REJECT: mossa illegale (tocca ancora a te), non è il tuo turno, timeout (il server ha passato)
+INVALID, NOT_YOUR_TURN, TIMEOUT, BAD_MESSAGE = 1, 2, 3, 4
+# END: partita finita, limite di turni, avversario disconnesso
+OVER, MAX_TURNS, DISCONNECTED = 0, 1, 2
+NO_TURN = 255  # current dello STATE finale
+
+ACTION_DTYPE = np.dtype([('player', 'u1'), ('type', 'u1'), ('x', '<u2'), ('y', '<u2')])
+ACTION_PLACE, ACTION_PASS = 0, 1
+
+_LEN = struct.Struct('<I')
+_JOIN = struct.Struct('<BHBq')
+_PLACE = struct.Struct('<BIHH')
+_PASS = struct.Struct('<BI')
+_START = struct.Struct('<BIBHBI')
+_STATE = struct.Struct('<BIB2q2dI')
+_REJECT = struct.Struct('<BB')
+_END = struct.Struct('<BbB')
+MAX_N = 4096  # lato massimo della board accettato in JOIN
+# il messaggio più grande è START con il terreno di lato MAX_N; gli STATE sono ben più piccoli
+MAX_MESSAGE = _START.size + 4 * MAX_N * MAX_N
+
+def frame(payload: bytes) -> bytes:
+    return _LEN.pack(len(payload)) + payload
+
+async def read_message(reader: asyncio.StreamReader) -> bytes:
+    """Payload del prossimo messaggio; IncompleteReadError se la connessione si chiude."""
+    (size,) = _LEN.unpack(await reader.readexactly(_LEN.size))
+    if size == 0 or size > MAX_MESSAGE:
+        raise ValueError(f'lunghezza messaggio non valida: {size}')
+    return await reader.readexactly(size)
+
+# ---------- Codifica -----------------------------------------------------------
+def encode_join(n: int, k: int, seed: int = -1) -> bytes:
+    return frame(_JOIN.pack(JOIN, n, k, seed))
+
+def encode_place(turn: int, x: int, y: int) -> bytes:
+    return frame(_PLACE.pack(PLACE, turn, x, y))
+
+def encode_pass(turn: int) -> bytes:
+    return frame(_PASS.pack(PASS, turn))
+
+def encode_start(match: int, player: int, n: int, k: int, timeout_ms: int,
+                 terrain: np.ndarray) -> bytes:
+    return frame(_START.pack(START, match, player, n, k, timeout_ms)
+                 + np.ascontiguousarray(terrain, dtype='<f4').tobytes())
+
+def encode_state(turn: int, current: int, credits: Sequence[int], scores: Sequence[float],
+                 history: List[Dict]) -> bytes:
+    actions = np.zeros(len(history), dtype=ACTION_DTYPE)
+    for rec, action in zip(actions, history):
+        rec['player'] = action['player']
+        if action['type'] == 'place':
+            rec['x'], rec['y'] = action['x'], action['y']
+        else:
+            rec['type'] = ACTION_PASS
+    return frame(_STATE.pack(STATE, turn, current, *credits, *scores, len(actions))
+                 + actions.tobytes())
+
+def encode_reject(code: int) -> bytes:
+    return frame(_REJECT.pack(REJECT, code))
+
+def encode_end(winner: int, reason: int) -> bytes:
+    return frame(_END.pack(END, winner, reason))
+
+# ---------- Decodifica -----------------------------------------------------------
+def decode(payload: bytes) -> Tuple:
+    """(tipo, campi...) di un payload; ValueError se malformato."""
+    kind = payload[0]
+    try:
+        if kind == JOIN:
+            return _JOIN.unpack(payload)
+        if kind == PLACE:
+            return _PLACE.unpack(payload)
+        if kind == PASS:
+            return _PASS.unpack(payload)
+        if kind == START:
+            _, match, player, n, k, timeout_ms = _START.unpack_from(payload)
+            terrain = np.frombuffer(payload, dtype='<f4', offset=_START.size).reshape(n, n)
+            return START, match, player, n, k, timeout_ms, terrain
+        if kind == STATE:
+            _, turn, current, c0, c1, s0, s1, count = _STATE.unpack_from(payload)
+            actions = np.frombuffer(payload, dtype=ACTION_DTYPE, count=count, offset=_STATE.size)
+            return STATE, turn, current, [c0, c1], [s0, s1], actions
+        if kind == REJECT:
+            return _REJECT.unpack(payload)
+        if kind == END:
+            return _END.unpack(payload)
+    except (struct.error, ValueError) as exc:
+        raise ValueError(f'messaggio {kind} malformato: {exc}') from None
+    raise ValueError(f'tipo di messaggio sconosciuto: {kind}')
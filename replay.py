@@ -0,0 +1,117 @@
+from __future__ import annotations
+import os
+from typing import Dict, List, Union
+from game import GameState
+
+
+class Replay:
+    """
+    Replay headless di una partita: riparte dallo stato iniziale e riapplica `history`.
+    Ogni `keyframe_interval` azioni conserva una copia dello stato, così seek(turn)
+    riparte dal keyframe più vicino invece che dall'inizio. Il passo indietro usa
+    GameState.undo. Usabile da script di analisi e dalla GUI (update(dt) non blocca).
+    """
+    def __init__(self, initial: GameState, history: List[Dict], keyframe_interval: int = 256,
+                 speed: float = 3.0):
+        self.history = history
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.keyframes: List[GameState] = [initial.clone(keep_undo=False)]
+        self._state = initial.clone(keep_undo=False)
+        self.position = 0  # azioni di history già applicate
+        self.speed = speed  # azioni al secondo in riproduzione
+        self.playing = False
+        self._pending = 0.0
+
+    @classmethod
+    def from_game(cls, gs: GameState, **kwargs) -> 'Replay':
+        """Replay di una partita salvata: stesso terreno e k, crediti e punteggi iniziali."""
+        return cls(GameState(gs.terrain, k=gs.k), gs.history, **kwargs)
+
+    @classmethod
+    def load(cls, filepath: Union[str, os.PathLike], **kwargs) -> 'Replay':
+        from save_load import load_game
+        return cls.from_game(load_game(filepath), **kwargs)
+
+    @property
+    def state(self) -> GameState:
+        """Stato corrente. Dopo un seek può essere un oggetto diverso: non tenerne riferimenti."""
+        return self._state
+
+    def __len__(self) -> int:
+        return len(self.history)
+
+    @property
+    def at_end(self) -> bool:
+        return self.position >= len(self.history)
+
+    # ------------------------------------------------------------------
+    def _apply(self, action: Dict):
+        gs = self._state
+        if action['type'] == 'place':
+            if not gs.place_fort(action['player'], action['x'], action['y']):
+                raise ValueError(f'azione {self.position} non valida: {action}')
+        else:
+            gs.pass_turn(action['player'])
+
+    def step(self) -> bool:
+        """Applica l'azione successiva; False se il replay è finito."""
+        if self.at_end:
+            return False
+        self._apply(self.history[self.position])
+        self.position += 1
+        if self.position % self.keyframe_interval == 0 and \
+                len(self.keyframes) == self.position // self.keyframe_interval:
+            self.keyframes.append(self._state.clone(keep_undo=False))
+        return True
+
+    def step_back(self) -> bool:
+        """Torna indietro di un'azione; False se si è già all'inizio."""
+        if self.position == 0:
+            return False
+        if self._state.undo():
+            self.position -= 1
+        else:
+            # lo stato viene da un keyframe senza stack di undo
+            self.seek(self.position - 1)
+        return True
+
+    def seek(self, turn: int):
+        """Porta il replay a `turn` azioni applicate, partendo dal keyframe più vicino."""
+        turn = max(0, min(turn, len(self.history)))
+        kf = min(turn // self.keyframe_interval, len(self.keyframes) - 1)
+        kf_turn = kf * self.keyframe_interval
+        if turn < self.position or kf_turn > self.position:
+            self._state = self.keyframes[kf].clone(keep_undo=False)
+            self.position = kf_turn
+        while self.position < turn:
+            self.step()
+
+    # ---------- Riproduzione a velocità variabile ---------------------------
+    def play(self):
+        self.playing = True
+
+    def pause(self):
+        self.playing = False
+        self._pending = 0.0
+
+    def toggle(self):
+        if self.playing:
+            self.pause()
+        else:
+            self.play()
+
+    def update(self, dt: float) -> int:
+        """Avanza di `speed * dt` azioni (dt in secondi, speed < 0 va all'indietro).
+        Ritorna quante azioni ha applicato o annullato."""
+        if not self.playing:
+            return 0
+        self._pending += abs(self.speed) * dt
+        move = self.step if self.speed >= 0 else self.step_back
+        done = 0
+        while self._pending >= 1.0:
+            self._pending -= 1.0
+            if not move():
+                self.pause()
+                break
+            done += 1
+        return done
@@ -1,16 +1,251 @@
-
-import json, datetime, os
+import json, datetime, os, struct, argparse, sys, threading
 from pathlib import Path
-from typing import Union
+from typing import Iterable, List, Union
+import numpy as np
 from game import GameState
+from forts import FortTable, RECORD_DTYPE
+
+# Formato binario .fwb:
+#   b'FWB1' | uint32 lunghezza header | header JSON | padding fino a 64 byte
+#   | terreno float32 n*n | forti (RECORD_DTYPE) | history (HISTORY_DTYPE)
+# Gli offset nel header sono relativi all'inizio dei dati, così il terreno
+# si apre con np.memmap senza copie.
+BINARY_EXT = '.fwb'
+MAGIC = b'FWB1'
+ALIGN = 64
+HISTORY_DTYPE = np.dtype([('type', 'u1'), ('player', 'u1'), ('x', '<i4'), ('y', '<i4')])
+ACTION_CODES = {'place': 0, 'pass': 1}
+ACTION_NAMES = {v: k for k, v in ACTION_CODES.items()}
+
+def _is_binary(filepath: Union[str, os.PathLike]) -> bool:
+    return Path(filepath).suffix.lower() == BINARY_EXT
 
-def save_game(gs: GameState, filepath: Union[str, os.PathLike]):
-    data = gs.to_dict()
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f)
+def save_game(gs: GameState, filepath: Union[str, os.PathLike], index: bool = True):
+    """Salva in JSON oppure, con estensione .fwb, nel formato binario.
+    Con index aggiunge i metadati della partita all'indice della cartella."""
+    # scrittura su un file temporaneo e os.replace: il salvataggio è atomico, e un
+    # terreno .fwb mappato dallo stesso file non viene troncato mentre lo si legge
+    path = Path(filepath)
+    tmp = path.with_name(path.name + f'.{os.getpid()}.tmp')
+    try:
+        if _is_binary(filepath):
+            _save_binary(gs, tmp)
+        else:
+            data = gs.to_dict()
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    if index:
+        update_index(gs, filepath)
 
-def load_game(filepath: Union[str, os.PathLike]) -> GameState:
-    from game import GameState
+def load_game(filepath: Union[str, os.PathLike], mmap: bool = True) -> GameState:
+    """Carica JSON o .fwb; con mmap il terreno .fwb resta mappato sul file."""
+    if _is_binary(filepath):
+        return _load_binary(filepath, mmap)
     with open(filepath, 'r', encoding='utf-8') as f:
         data = json.load(f)
     return GameState.from_dict(data)
+
+# ---------- Formato binario ------------------------------------------------
+def _history_records(history: List[dict]) -> np.ndarray:
+    records = np.empty(len(history), dtype=HISTORY_DTYPE)
+    records['type'] = [ACTION_CODES[a['type']] for a in history]
+    records['player'] = [a['player'] for a in history]
+    records['x'] = [a.get('x', -1) for a in history]
+    records['y'] = [a.get('y', -1) for a in history]
+    return records
+
+def _history_list(records: np.ndarray) -> List[dict]:
+    history = []
+    for t, p, x, y in zip(records['type'].tolist(), records['player'].tolist(),
+                          records['x'].tolist(), records['y'].tolist()):
+        if t == ACTION_CODES['place']:
+            history.append({'type': 'place', 'player': p, 'x': x, 'y': y})
+        else:
+            history.append({'type': 'pass', 'player': p})
+    return history
+
+def _save_binary(gs: GameState, filepath: Union[str, os.PathLike]):
+    terrain = np.ascontiguousarray(gs.terrain, dtype='<f4')
+    forts = gs.forts.to_records()
+    history = _history_records(gs.history)
+    sections = {}
+    offset = 0
+    for name, arr in (('terrain', terrain), ('forts', forts), ('history', history)):
+        sections[name] = {'offset': offset, 'count': int(arr.size)}
+        offset += -(-arr.nbytes // 8) * 8  # ogni sezione allineata a 8 byte
+    header = json.dumps({
+        'version': 1,
+        'n': gs.n,
+        'k': gs.k,
+        'credits': list(gs.credits),
+        'scores': list(gs.scores),
+        'turn_count': gs.turn_count,
+        'current_player': gs.current_player,
+        'sections': sections,
+    }).encode('utf-8')
+    start = -(-(len(MAGIC) + 4 + len(header)) // ALIGN) * ALIGN
+    with open(filepath, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header)))
+        f.write(header)
+        for name, arr in (('terrain', terrain), ('forts', forts), ('history', history)):
+            f.seek(start + sections[name]['offset'])
+            f.write(arr.tobytes())
+        f.truncate(start + offset)
+
+def read_binary_header(filepath: Union[str, os.PathLike]) -> dict:
+    """Legge solo il header di un .fwb; 'data_start' è l'offset assoluto dei dati."""
+    with open(filepath, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f'{filepath}: non è un salvataggio {BINARY_EXT}')
+        (length,) = struct.unpack('<I', f.read(4))
+        header = json.loads(f.read(length).decode('utf-8'))
+    header['data_start'] = -(-(len(MAGIC) + 4 + length) // ALIGN) * ALIGN
+    return header
+
+def _load_binary(filepath: Union[str, os.PathLike], mmap: bool) -> GameState:
+    header = read_binary_header(filepath)
+    start, n, sec = header['data_start'], header['n'], header['sections']
+    if mmap:
+        terrain = np.memmap(filepath, dtype='<f4', mode='r',
+                            offset=start + sec['terrain']['offset'], shape=(n, n))
+    else:
+        terrain = np.fromfile(filepath, dtype='<f4', count=n * n,
+                              offset=start + sec['terrain']['offset']).reshape(n, n)
+    forts = np.fromfile(filepath, dtype=RECORD_DTYPE, count=sec['forts']['count'],
+                        offset=start + sec['forts']['offset'])
+    history = np.fromfile(filepath, dtype=HISTORY_DTYPE, count=sec['history']['count'],
+                          offset=start + sec['history']['offset'])
+    return GameState.from_dict({
+        'terrain': terrain,
+        'k': header['k'],
+        'forts': FortTable.from_records(forts),
+        'credits': header['credits'],
+        'scores': header['scores'],
+        'turn_count': header['turn_count'],
+        'current_player': header['current_player'],
+        'history': _history_list(history),
+    })
+
+# ---------- Indice dei salvataggi ------------------------------------------
+# Una riga JSON per salvataggio in INDEX_NAME, nella stessa cartella dei file: il menu
+# legge solo questo file e carica una partita intera solo quando viene scelta. È
+# append-only; se lo stesso file viene salvato più volte vale l'ultima riga, e un file
+# cancellato viene tolto con una riga {'file': ..., 'removed': true}.
+INDEX_NAME = 'fortwars_index.jsonl'
+SAVE_PATTERNS = ('fortwars_*.json', 'fortwars_*' + BINARY_EXT)
+# tra le append e il rimpiazzo dell'indice in rebuild_index (che la GUI lancia in un thread)
+_index_lock = threading.Lock()
+
+def game_metadata(gs: GameState, filepath: Union[str, os.PathLike]) -> dict:
+    path = Path(filepath)
+    return {
+        'file': path.name,
+        'saved': datetime.datetime.fromtimestamp(path.stat().st_mtime).isoformat(timespec='seconds'),
+        'n': gs.n,
+        'k': gs.k,
+        'turn_count': gs.turn_count,
+        'forts': len(gs.forts),
+        'scores': [round(float(s), 4) for s in gs.scores],
+        'credits': list(gs.credits),
+        'winner': gs.winner(),
+    }
+
+def update_index(gs: GameState, filepath: Union[str, os.PathLike]):
+    _append_index(filepath, game_metadata(gs, filepath))
+
+def remove_from_index(filepath: Union[str, os.PathLike]):
+    """Segna nell'indice che il salvataggio non c'è più."""
+    _append_index(filepath, {'file': Path(filepath).name, 'removed': True})
+
+def _append_index(filepath: Union[str, os.PathLike], entry: dict):
+    line = json.dumps(entry, separators=(',', ':')) + '\n'
+    # una sola write in append: righe di processi diversi non si mescolano
+    with _index_lock, open(Path(filepath).parent / INDEX_NAME, 'a', encoding='utf-8') as f:
+        f.write(line)
+
+def read_index(directory: Union[str, os.PathLike] = '.') -> List[dict]:
+    """Metadati dei salvataggi della cartella, dal più recente; [] se l'indice non c'è."""
+    path = Path(directory) / INDEX_NAME
+    if not path.exists():
+        return []
+    entries = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # riga troncata da un crash
+            entries.pop(entry['file'], None)
+            if not entry.get('removed'):
+                entries[entry['file']] = entry
+    return list(reversed(entries.values()))
+
+def rebuild_index(directory: Union[str, os.PathLike] = '.') -> List[dict]:
+    """
+    Riscrive l'indice leggendo tutti i salvataggi della cartella (anche quelli vecchi).
+    I file illeggibili restano fuori, con un avviso su stderr. Le righe aggiunte da
+    save_game mentre si ricostruisce vengono riportate in coda al nuovo indice.
+    """
+    directory = Path(directory)
+    index = directory / INDEX_NAME
+    start = index.stat().st_size if index.exists() else 0
+    paths = sorted((p for pattern in SAVE_PATTERNS for p in directory.glob(pattern)),
+                   key=lambda p: p.stat().st_mtime)
+    tmp = directory / (INDEX_NAME + f'.{os.getpid()}.{threading.get_ident()}.tmp')
+    try:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for path in paths:
+                try:
+                    entry = game_metadata(load_game(path), path)
+                except Exception as exc:
+                    print(f'{path}: salvataggio illeggibile, escluso dall\'indice ({exc!r})',
+                          file=sys.stderr)
+                    continue
+                f.write(json.dumps(entry, separators=(',', ':')) + '\n')
+            with _index_lock:
+                if index.exists():
+                    with open(index, 'rb') as old:
+                        old.seek(start)
+                        f.write(old.read().decode('utf-8'))
+                f.close()
+                os.replace(tmp, index)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    return read_index(directory)
+
+# ---------- Conversione ----------------------------------------------------
+def convert_saves(paths: Iterable[Union[str, os.PathLike]], ext: str = BINARY_EXT,
+                  remove: bool = False) -> List[Path]:
+    """Converte i salvataggi nel formato dato dall'estensione `ext` (.fwb o .json)."""
+    written = []
+    for path in map(Path, paths):
+        target = path.with_suffix(ext)
+        if target == path:
+            continue
+        save_game(load_game(path, mmap=False), target)
+        if remove:
+            path.unlink()
+            remove_from_index(path)
+        written.append(target)
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description='Converte salvataggi Fort Wars tra JSON e .fwb')
+    parser.add_argument('paths', nargs='*', help='es. fortwars_*.json')
+    parser.add_argument('--to', default=BINARY_EXT, choices=[BINARY_EXT, '.json'])
+    parser.add_argument('--remove', action='store_true', help='cancella i file originali')
+    parser.add_argument('--reindex', metavar='DIR', help="ricostruisce l'indice dei salvataggi di DIR")
+    args = parser.parse_args()
+    for target in convert_saves(args.paths, args.to, args.remove):
+        print(target)
+    if args.reindex:
+        print(f'{len(rebuild_index(args.reindex))} salvataggi indicizzati')
+
+if __name__ == '__main__':
+    main()
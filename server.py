@@ -0,0 +1,250 @@
+"""
+Server asyncio per partite tra agenti remoti, su TCP o socket Unix.
+
+    python server.py --tcp 127.0.0.1:7777 --timeout 1.0
+    python server.py --unix /tmp/fortwars.sock
+
+Ogni connessione manda JOIN(n, k, seed): due client con gli stessi n e k vengono
+accoppiati in una partita (il primo è il giocatore 0). Un solo processo regge migliaia
+di partite: nessun loop a frame, solo messaggi e un timer per mossa; allo scadere il
+server passa il turno per il giocatore. Un giocatore senza mosse valide passa in
+automatico, come nella GUI. Protocollo in protocol.py, client in client.py.
+"""
+from __future__ import annotations
+import argparse, asyncio, functools, os, sys, time
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import protocol as P
+from game import GameState
+from terrain import generate_terrain
+
+MAX_WRITE_BUFFER = 1 << 20  # un client che non legge oltre questa soglia viene chiuso
+BACKLOG = 4096  # molti client si connettono insieme all'avvio di un torneo
+THREAD_TERRAIN_N = 128  # da questo lato in su il terreno si genera fuori dal loop
+
+
+class Connection:
+    def __init__(self, server: 'FortWarsServer', reader: asyncio.StreamReader,
+                 writer: asyncio.StreamWriter):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.match: Optional[Match] = None
+        self.player = -1
+
+    def send(self, data: bytes):
+        if self.writer.is_closing():
+            return
+        self.writer.write(data)
+        if self.writer.transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+            self.writer.close()
+
+
+class Match:
+    def __init__(self, server: 'FortWarsServer', match_id: int, gs: GameState,
+                 conns: List[Connection]):
+        self.server = server
+        self.id = match_id
+        self.gs = gs
+        self.conns = conns
+        self.sent = [0, 0]  # azioni di gs.history già inviate a ciascun giocatore
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.done = False
+
+    def begin(self):
+        timeout_ms = int(self.server.timeout * 1000)
+        for p, conn in enumerate(self.conns):
+            conn.match, conn.player = self, p
+            conn.send(P.encode_start(self.id, p, self.gs.n, self.gs.k, timeout_ms, self.gs.terrain))
+        self.advance()
+
+    def flush(self, p: int):
+        """Manda a `p` lo stato con le azioni che non ha ancora visto."""
+        gs = self.gs
+        current = P.NO_TURN if self.done else gs.current_player
+        self.conns[p].send(P.encode_state(gs.turn_count, current, gs.credits, gs.scores,
+                                          gs.history[self.sent[p]:]))
+        self.sent[p] = len(gs.history)
+
+    def act(self, player: int, turn: int, cell: Optional[Tuple[int, int]]):
+        gs = self.gs
+        if self.done or turn != gs.turn_count:
+            return  # mossa arrivata dopo il timeout: il client riceverà lo stato nuovo
+        if player != gs.current_player:
+            self.conns[player].send(P.encode_reject(P.NOT_YOUR_TURN))
+            return
+        if cell is None:
+            gs.pass_turn(player)
+        elif not gs.place_fort(player, *cell):
+            self.conns[player].send(P.encode_reject(P.INVALID))
+            return
+        self.server.moves += 1
+        self.advance()
+
+    def advance(self):
+        gs = self.gs
+        while not gs.is_over() and not gs.any_valid_move(gs.current_player):
+            gs.pass_turn(gs.current_player)
+        if gs.is_over():
+            self.finish(P.OVER)
+        elif gs.turn_count >= self.server.max_turns:
+            self.finish(P.MAX_TURNS)
+        else:
+            self.flush(gs.current_player)
+            self._arm_timer()
+
+    def _arm_timer(self):
+        if self.timer is not None:
+            self.timer.cancel()
+        self.timer = asyncio.get_running_loop().call_later(self.server.timeout, self.on_timeout,
+                                                           self.gs.turn_count)
+
+    def on_timeout(self, turn: int):
+        gs = self.gs
+        if self.done or turn != gs.turn_count:
+            return
+        p = gs.current_player
+        self.conns[p].send(P.encode_reject(P.TIMEOUT))
+        self.server.timeouts += 1
+        gs.pass_turn(p)
+        self.advance()
+
+    def finish(self, reason: int, winner: Optional[int] = None):
+        if self.done:
+            return
+        self.done = True
+        if self.timer is not None:
+            self.timer.cancel()
+        if winner is None:
+            s0, s1 = self.gs.scores
+            winner = 0 if s0 > s1 else 1 if s1 > s0 else -1
+        for p, conn in enumerate(self.conns):
+            conn.match = None
+            self.flush(p)
+            conn.send(P.encode_end(winner, reason))
+        self.server.matches.pop(self.id, None)
+        self.server.finished += 1
+
+    def disconnect(self, player: int):
+        self.conns[player].writer.close()
+        self.finish(P.DISCONNECTED, winner=1 - player)
+
+
+class FortWarsServer:
+    def __init__(self, timeout: float = 1.0, max_turns: int = 10_000, cache_dir: str | None = None):
+        self.timeout = timeout
+        self.max_turns = max_turns
+        self.cache_dir = cache_dir
+        self.matches: Dict[int, Match] = {}
+        self._waiting: Dict[Tuple[int, int], Tuple[Connection, int]] = {}
+        self._next_id = 0
+        self.moves = self.timeouts = self.finished = 0
+        self.connections = 0
+
+    async def start_tcp(self, host: str = '127.0.0.1', port: int = 7777) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.handle, host, port, backlog=BACKLOG)
+
+    async def start_unix(self, path: str) -> asyncio.AbstractServer:
+        if os.path.exists(path):
+            os.unlink(path)
+        return await asyncio.start_unix_server(self.handle, path, backlog=BACKLOG)
+
+    async def join(self, conn: Connection, n: int, k: int, seed: int):
+        key = (n, k)
+        other = self._waiting.pop(key, None)
+        if other is None or other[0] is conn or other[0].writer.is_closing():
+            self._waiting[key] = (conn, seed)
+            return
+        first, seed = other
+        if seed < 0:
+            seed = int(np.random.default_rng().integers(1 << 62))
+        match_id = self._next_id
+        self._next_id += 1
+        make = functools.partial(generate_terrain, n, seed=seed, cache_dir=self.cache_dir)
+        if n < THREAD_TERRAIN_N:
+            terrain = make()
+        else:
+            # a n grandi il terreno costa fino a un secondo: in un thread, mentre il loop
+            # continua a servire le altre partite (e i loro timer)
+            terrain = await asyncio.get_running_loop().run_in_executor(None, make)
+        closed = [c for c in (first, conn) if c.writer.is_closing()]
+        if closed:
+            for c in (first, conn):
+                if c not in closed:
+                    await self.join(c, n, k, -1)  # torna in coda ad aspettare un avversario
+            return
+        gs = GameState(terrain, k=k)
+        match = self.matches[match_id] = Match(self, match_id, gs, [first, conn])
+        match.begin()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        conn = Connection(self, reader, writer)
+        self.connections += 1
+        try:
+            while True:
+                msg = P.decode(await P.read_message(reader))
+                kind = msg[0]
+                if kind == P.JOIN and conn.match is None:
+                    _, n, k, seed = msg
+                    if not (1 <= n <= P.MAX_N):
+                        conn.send(P.encode_reject(P.BAD_MESSAGE))
+                        continue
+                    await self.join(conn, n, k, seed)
+                elif kind in (P.PLACE, P.PASS):
+                    # senza partita è una mossa arrivata dopo END: si scarta
+                    if conn.match is not None:
+                        cell = (msg[2], msg[3]) if kind == P.PLACE else None
+                        conn.match.act(conn.player, msg[1], cell)
+                else:
+                    conn.send(P.encode_reject(P.BAD_MESSAGE))
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            self.connections -= 1
+            if conn.match is not None:
+                conn.match.disconnect(conn.player)
+            for key, (waiting, _) in list(self._waiting.items()):
+                if waiting is conn:
+                    del self._waiting[key]
+            writer.close()
+
+    def stats(self) -> Dict:
+        return {'connections': self.connections, 'matches': len(self.matches),
+                'finished': self.finished, 'moves': self.moves, 'timeouts': self.timeouts}
+
+
+async def serve(tcp: str | None = None, unix: str | None = None, timeout: float = 1.0,
+                max_turns: int = 10_000, stats_interval: float | None = None):
+    server = FortWarsServer(timeout, max_turns)
+    if unix:
+        listener = await server.start_unix(unix)
+    else:
+        host, _, port = (tcp or '127.0.0.1:7777').rpartition(':')
+        listener = await server.start_tcp(host or '127.0.0.1', int(port))
+    async with listener:
+        if not stats_interval:
+            await listener.serve_forever()
+        last, moves = time.perf_counter(), 0
+        while True:
+            await asyncio.sleep(stats_interval)
+            now = time.perf_counter()
+            stats = server.stats()
+            rate = (stats['moves'] - moves) / (now - last)
+            last, moves = now, stats['moves']
+            print(f"{stats}  {rate:.0f} mosse/s", file=sys.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description='Server Fort Wars per agenti remoti')
+    parser.add_argument('--tcp', type=str, default=None, help='host:porta (default 127.0.0.1:7777)')
+    parser.add_argument('--unix', type=str, default=None, help='path del socket Unix')
+    parser.add_argument('--timeout', type=float, default=1.0, help='secondi per mossa')
+    parser.add_argument('--max-turns', type=int, default=10_000)
+    parser.add_argument('--stats', type=float, default=None, help='secondi tra due statistiche')
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.tcp, args.unix, args.timeout, args.max_turns, args.stats))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
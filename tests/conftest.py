@@ -0,0 +1,29 @@
+import os, sys, numpy as np, pytest
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from game import GameState
+from terrain import generate_terrain
+
+def play_random_game(n: int, k: int = 1, seed: int = 0, turns: int | None = None,
+                     place: float = 0.7) -> GameState:
+    """
+    Partita casuale riproducibile: a ogni turno piazza su una casella legale con
+    probabilità `place`, altrimenti passa. Gioca `turns` turni, o fino alla fine se None.
+    """
+    gs = GameState(generate_terrain(n, seed=seed), k=k)
+    rng = np.random.default_rng(seed)
+    turn = 0
+    while (turn < turns) if turns is not None else not gs.is_over():
+        p = gs.current_player
+        xs, ys = np.nonzero(gs.legal_mask(p))
+        if len(xs) and rng.random() < place:
+            i = rng.integers(len(xs))
+            gs.place_fort(p, int(xs[i]), int(ys[i]))
+        else:
+            gs.pass_turn(p)
+        turn += 1
+    return gs
+
+@pytest.fixture
+def played_game():
+    """play_random_game, da chiamare con i parametri del test."""
+    return play_random_game
@@ -0,0 +1,13 @@
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+import bench
+
+def test_bench_smoke_and_compare():
+    current = bench.run_benchmarks(sizes=[18], repeat=1)
+    keys = set(current['results'])
+    for group in bench.GROUPS:
+        assert any(key.startswith(group + '.') for key in keys)
+    assert all(r['median'] > 0 for r in current['results'].values())
+    slower = {'results': {k: {**r, 'best': r['best'] / 2} for k, r in current['results'].items()}}
+    assert all(r['regression'] for r in bench.compare(current, slower, tolerance=0.3))
+    assert not any(r['regression'] for r in bench.compare(current, current))
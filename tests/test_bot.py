@@ -0,0 +1,38 @@
+import os, sys, numpy as np, pytest
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from game import GameState, COST_FORT
+from terrain import generate_terrain
+from bot import HeuristicBot
+
+def test_incremental_values_match_full_recompute():
+    gs = GameState(generate_terrain(40, seed=4), k=2)
+    gs.set_credits(0, COST_FORT * 1000)
+    gs.set_credits(1, COST_FORT * 1000)
+    rng = np.random.default_rng(4)
+    bots = [HeuristicBot(), HeuristicBot(policy='softmax'), HeuristicBot(policy='epsilon', epsilon=0.5)]
+    for i in range(60):
+        bot = bots[i % 3]
+        move = bot(gs, rng)
+        if move is None:
+            gs.pass_turn(gs.current_player)
+        else:
+            assert gs.place_fort(gs.current_player, *move)
+        if i == 30:
+            gs.undo()  # lo stato torna indietro: il bot deve accorgersene
+    for bot in bots:
+        bot.sync(gs)
+        fresh = HeuristicBot()
+        fresh.sync(gs)
+        assert np.array_equal(np.isinf(bot.values), ~gs._free[None].repeat(2, 0))
+        np.testing.assert_allclose(bot.values, fresh.values, atol=1e-5)
+
+def test_greedy_prefers_high_ground_and_passes_without_credits():
+    terrain = np.full((12, 12), 0.5, dtype=np.float32)
+    terrain[7, 4] = 0.95
+    gs = GameState(terrain, k=1)
+    rng = np.random.default_rng(0)
+    assert HeuristicBot()(gs, rng) == (7, 4)
+    gs.set_credits(0, 0)
+    assert HeuristicBot()(gs, rng) is None
+    with pytest.raises(ValueError):
+        HeuristicBot(policy='minimax')
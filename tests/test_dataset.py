@@ -0,0 +1,32 @@
+import os, sys, numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from dataset import TrajectoryWriter, TrajectoryDataset
+
+def test_write_shards_and_read_back(tmp_path, played_game):
+    games = [played_game(12, seed=s) for s in range(6)]
+    with TrajectoryWriter(tmp_path, max_shard_bytes=4096) as writer:
+        for gs in games[:4]:
+            writer.add_game(gs)
+    # riapertura: si accoda senza riscrivere
+    with TrajectoryWriter(tmp_path, max_shard_bytes=4096) as writer:
+        for gs in games[4:]:
+            writer.add_game(gs)
+    assert len(list(tmp_path.glob('shard_*.bin'))) > 1
+
+    ds = TrajectoryDataset(tmp_path)
+    assert len(ds) == 6
+    for i, gs in enumerate(games):
+        terrain, steps = ds.game(i)
+        assert np.array_equal(terrain, gs.terrain)
+        assert len(steps) == len(gs.history)
+        assert abs(steps['reward'].astype(float).sum() - sum(gs.scores)) < 1e-4
+        assert ds.index[i]['winner'] == gs.winner()
+        first_pass = next(j for j, a in enumerate(gs.history) if a['type'] == 'pass')
+        assert steps['action'][first_pass] == gs.n * gs.n
+
+    total = sum(len(gs.history) for gs in games)
+    batches = list(ds.iter_batches(16, seed=0, games_per_block=2))
+    assert all(len(b['action']) == 16 for b in batches[:-1])
+    assert sum(len(b['action']) for b in batches) == total
+    seen = np.concatenate([b['game'] for b in batches])
+    assert np.bincount(seen).tolist() == [len(gs.history) for gs in games]
@@ -0,0 +1,37 @@
+import os, sys, subprocess, numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from env import FortWarsEnv
+from game import COST_FORT
+
+def test_observation_updated_in_place():
+    env = FortWarsEnv(n=10, k=1)
+    obs = env.reset(seed=3)
+    rng = np.random.default_rng(0)
+    done = poor = False
+    while not done:
+        mask = env.action_mask()
+        action = rng.choice(np.flatnonzero(mask))
+        obs, reward, done, info = env.step(action)
+        gs = env.gs
+        me = gs.current_player
+        own = np.zeros((10, 10), dtype=np.float32)
+        enemy = np.zeros((10, 10), dtype=np.float32)
+        for f in gs.forts:
+            (own if f['player'] == me else enemy)[f['x'], f['y']] = 1.0
+        assert (obs[0] == gs.terrain).all()
+        assert (obs[1] == own).all() and (obs[2] == enemy).all()
+        legal = env.action_mask()[:-1].reshape(10, 10)
+        # 'free' non guarda i crediti: coincide con le mosse legali solo se può pagare
+        if gs.credits[me] >= COST_FORT:
+            assert (legal == (obs[3] == 1)).all()
+        else:
+            assert not legal.any()
+            poor = True
+    assert poor  # la partita è passata anche da un turno senza crediti
+    assert obs.base is not None  # vista sul buffer preallocato
+    assert info['winner'] in (0, 1, -1)
+
+def test_import_without_pygame():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = "import sys, env; assert 'pygame' not in sys.modules"
+    subprocess.run([sys.executable, '-c', code], cwd=root, check=True)
@@ -10,3 +10,143 @@ def test_place_and_production():
     gs.pass_turn(0)
     assert gs.credits[0] == 2000 - COST_FORT + gs.production(0.5)
 
+
+def _brute_can_place(gs, player, x, y):
+    if gs.credits[player] < COST_FORT or gs.terrain[x, y] < 0.3:
+        return False
+    return all(gs.distance2(x, y, f['x'], f['y']) > gs.k**2 for f in gs.forts)
+
+def test_legal_mask_matches_fort_scan():
+    rng = np.random.default_rng(0)
+    terrain = rng.random((12, 12)).astype(np.float32)
+    gs = GameState(terrain, k=2)
+    for _ in range(60):
+        p = gs.current_player
+        mask = gs.legal_mask(p)
+        expected = [[_brute_can_place(gs, p, x, y) for y in range(12)] for x in range(12)]
+        assert (mask == np.array(expected)).all()
+        assert gs.any_valid_move(p) == bool(mask.any())
+        if mask.any() and rng.random() < 0.7:
+            xs, ys = np.nonzero(mask)
+            i = rng.integers(len(xs))
+            assert gs.place_fort(p, int(xs[i]), int(ys[i]))
+        else:
+            gs.pass_turn(p)
+    restored = GameState.from_dict(gs.to_dict())
+    assert (restored.legal_mask(0) == gs.legal_mask(0)).all()
+
+def test_undo_and_clone():
+    rng = np.random.default_rng(2)
+    gs = GameState(rng.random((10, 10)).astype(np.float32), k=1)
+    snapshots = []
+    for _ in range(40):
+        snapshots.append(gs.to_dict())
+        p = gs.current_player
+        xs, ys = np.nonzero(gs.legal_mask(p))
+        if len(xs) and rng.random() < 0.6:
+            i = rng.integers(len(xs))
+            gs.place_fort(p, int(xs[i]), int(ys[i]))
+        else:
+            gs.pass_turn(p)
+    copy = gs.clone()
+    assert copy.terrain is gs.terrain
+    while snapshots:
+        assert gs.undo()
+        expected = GameState.from_dict(snapshots.pop())
+        assert gs.to_dict() == expected.to_dict()
+        assert (gs._free == expected._free).all() and gs._free_count == expected._free_count
+    assert not gs.undo()
+    # la copia non risente degli undo sull'originale
+    assert copy.turn_count == 40 and len(copy.history) == 40
+
+def test_fort_table_compat():
+    terrain = np.full((6, 6), 0.5, dtype=np.float32)
+    gs = GameState(terrain, k=0)
+    for x, y in [(0, 0), (3, 3), (0, 1)]:
+        gs.place_fort(gs.current_player, x, y)
+    assert gs.forts[1] == {'player': 1, 'x': 3, 'y': 3, 'height': 0.5, 'turn': 1}
+    assert gs.forts.indices(0).tolist() == [0, 2]
+    restored = GameState.from_dict(gs.to_dict())
+    assert list(restored.forts) == list(gs.forts)
+    assert restored._adjacent_bonus(0) == 1.5 and restored._adjacent_bonus(1) == 1.0
+
+def test_income_matches_full_recount():
+    rng = np.random.default_rng(4)
+    gs = GameState((0.3 + 0.7 * rng.random((8, 8))).astype(np.float32), k=0)
+    incomes = []
+    forced = [(0, 0), (7, 7), (0, 1), (7, 6)]
+    for _ in range(50):
+        p = gs.current_player
+        xs, ys = np.nonzero(gs.legal_mask(p))
+        if forced:
+            gs.place_fort(p, *forced.pop(0))
+        elif len(xs) and rng.random() < 0.7:
+            i = rng.integers(len(xs))
+            gs.place_fort(p, int(xs[i]), int(ys[i]))
+        else:
+            gs.pass_turn(p)
+        recount = GameState.from_dict(gs.to_dict())
+        assert [gs.income(0), gs.income(1)] == [recount.income(0), recount.income(1)]
+        assert (gs.forts.bonuses == recount.forts.bonuses).all()
+        incomes.append([gs.income(0), gs.income(1)])
+    assert any(gs.forts.bonuses)
+    incomes.pop()
+    while incomes:
+        gs.undo()
+        assert [gs.income(0), gs.income(1)] == incomes.pop()
+
+def test_spatial_index_queries():
+    rng = np.random.default_rng(6)
+    gs = GameState((0.3 + 0.7 * rng.random((16, 16))).astype(np.float32), k=0)
+    gs.set_credits(0, 10**6)
+    gs.set_credits(1, 10**6)
+    for _ in range(120):
+        x, y = rng.integers(16, size=2)
+        gs.place_fort(gs.current_player, int(x), int(y))
+    forts = list(gs.forts)
+    for x, y, r in [(0, 0, 2), (8, 8, 3), (15, 3, 1), (5, 5, 0)]:
+        expected = [i for i, f in enumerate(forts) if gs.distance2(x, y, f['x'], f['y']) <= r * r]
+        assert sorted(gs.forts_within(x, y, r).tolist()) == expected
+    pairs = set()
+    for i, f in enumerate(forts):
+        expected = [j for j, o in enumerate(forts) if j != i and o['player'] == f['player']
+                    and gs.distance2(f['x'], f['y'], o['x'], o['y']) <= 1]
+        assert sorted(gs.neighbours(i).tolist()) == expected
+        pairs.update((min(i, j), max(i, j)) for j in expected)
+    assert sorted(tuple(sorted(p)) for p in gs.adjacent_pairs().tolist()) == sorted(pairs)
+
+def test_zobrist_hash():
+    terrain = np.full((8, 8), 0.5, dtype=np.float32)
+    a, b = GameState(terrain, k=1), GameState(terrain, k=1)
+    for gs in (a, b):
+        gs.set_credits(0, 8000)
+        gs.set_credits(1, 8000)
+    for x, y in [(0, 0), (5, 5), (2, 2), (7, 0)]:
+        a.place_fort(a.current_player, x, y)
+    for x, y in [(2, 2), (7, 0), (0, 0), (5, 5)]:
+        b.place_fort(b.current_player, x, y)
+    assert a.zobrist == b.zobrist  # stessi forti, ordine diverso
+    hashes = [a.zobrist]
+    a.pass_turn(a.current_player)
+    hashes.append(a.zobrist)
+    assert a.place_fort(a.current_player, 4, 7)
+    assert len({*hashes, a.zobrist}) == 3
+    assert GameState.from_dict(a.to_dict()).zobrist == a.zobrist
+    a.undo()
+    assert a.zobrist == hashes.pop()
+    a.undo()
+    assert a.zobrist == hashes.pop() == b.zobrist
+
+def test_set_credits_keeps_hash():
+    gs = GameState(np.full((8, 8), 0.5, dtype=np.float32), k=1)
+    gs.place_fort(0, 1, 1)
+    gs.set_credits(1, 10 * COST_FORT)
+    gs.place_fort(1, 5, 5)
+    gs.set_credits(0, 0)
+    fresh = gs.zobrist
+    gs._reset_hash()
+    assert gs.zobrist == fresh
+    gs.undo()  # l'undo dopo set_credits non ripristina un hash vecchio
+    fresh = gs.zobrist
+    gs._reset_hash()
+    assert gs.zobrist == fresh
@@ -0,0 +1,66 @@
+import os, sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+import numpy as np, pygame
+from game import GameState
+from terrain import generate_terrain
+from save_load import save_game, load_game
+from gui import FortWarsGUI, height_color, height_colors
+
+def test_height_colors_matches_scalar():
+    heights = np.linspace(0, 1, 1001, dtype=np.float32)
+    expected = np.array([height_color(float(h)) for h in heights], dtype=np.uint8)
+    assert np.array_equal(height_colors(heights), expected)
+
+def test_draw_caches_layers(monkeypatch):
+    gui = FortWarsGUI(n=12, window=(360, 420), autostart=False)
+    updates = []
+    monkeypatch.setattr(pygame.display, 'update', lambda *a: updates.append(a))
+    monkeypatch.setattr(pygame.mouse, 'get_pos', lambda: (-1, -1))
+    gui.draw()
+    assert len(updates) == 1
+    gui.draw()  # niente è cambiato: nessun blit né update
+    assert len(updates) == 1
+    layer = gui.forts_layer()
+    gui.gs.pass_turn(gui.gs.current_player)
+    assert gui.forts_layer() is layer  # un passo non tocca i forti
+    xs, ys = np.nonzero(gui.gs.legal_mask(gui.gs.current_player))
+    assert gui.gs.place_fort(gui.gs.current_player, int(xs[0]), int(ys[0]))
+    assert gui.forts_layer() is not layer
+
+def test_replay_of_other_size(tmp_path):
+    gs = GameState(generate_terrain(24, seed=1), k=3)
+    gs.place_fort(0, 5, 5)
+    save_game(gs, tmp_path / 'fortwars_big.json', index=False)
+    gui = FortWarsGUI(n=18, replay_path=str(tmp_path / 'fortwars_big.json'), autostart=False)
+    assert (gui.n, gui.k) == (24, 3)
+    gui.replay.seek(len(gui.replay))
+    gui.gs = gui.replay.state
+    gui.draw()
+    assert gui.tooltip_lines(gui.offset_x + 23 * gui.tile_size, gui.offset_y + 23 * gui.tile_size)
+    # board più grande della finestra in pixel: caselle da 1 pixel, niente divisioni per zero
+    big = GameState(generate_terrain(600, seed=2), k=2)
+    big.place_fort(0, 300, 300)
+    save_game(big, tmp_path / 'fortwars_huge.fwb', index=False)
+    gui.start_replay(load_game(tmp_path / 'fortwars_huge.fwb'))
+    assert gui.tile_size == 1
+    gui.replay.seek(len(gui.replay))
+    gui.gs = gui.replay.state
+    gui._tooltip = None
+    gui.draw()
+    assert gui.tooltip_lines(gui.offset_x + 5, gui.offset_y + 5)
+
+def test_menu_indexes_old_saves_in_background(tmp_path, monkeypatch):
+    from save_load import INDEX_NAME
+    import time
+    monkeypatch.chdir(tmp_path)
+    save_game(GameState(generate_terrain(10, seed=2), k=1), tmp_path / 'fortwars_old.json', index=False)
+    gui = FortWarsGUI(n=10, autostart=False)
+    pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_n, unicode='n'))
+    gui.menu_loop()  # N: nuova partita subito, senza aspettare l'indice
+    for _ in range(100):
+        if (tmp_path / INDEX_NAME).exists():
+            break
+        time.sleep(0.05)
+    assert (tmp_path / INDEX_NAME).exists()
@@ -0,0 +1,26 @@
+import io, json, os, sys, time
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from game import GameState
+from terrain import generate_terrain
+from profiling import Profiler
+
+def test_profiler_counts_and_restores():
+    original = GameState.__dict__['can_place'], GameState.__dict__['from_dict']
+    gs = GameState(generate_terrain(12, seed=1), k=1)
+    out = io.StringIO()
+    with Profiler(interval=0.01, out=out) as prof:
+        gs.place_fort(0, 5, 5)
+        gs.pass_turn(1)
+        gs.any_valid_move(0)
+        GameState.from_dict(gs.to_dict())
+        time.sleep(0.05)
+        snap = prof.snapshot()
+    assert snap['methods']['place_fort']['calls'] == 1
+    assert snap['methods']['can_place']['calls'] == 1  # chiamata da place_fort
+    assert snap['methods']['pass_turn']['forts_max'] == 1
+    assert snap['methods']['any_valid_move']['free_cells_mean'] == gs._free_count
+    assert snap['methods']['from_dict']['calls'] == 1
+    assert json.loads(out.getvalue().splitlines()[0])['methods']
+    assert (GameState.__dict__['can_place'], GameState.__dict__['from_dict']) == original
+    prof.reset()
+    assert prof.snapshot()['methods'] == {}
@@ -0,0 +1,32 @@
+import os, sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from replay import Replay
+
+def test_seek_and_step_back(played_game):
+    gs = played_game(20, seed=8, turns=120, place=0.5)
+    reference = Replay.from_game(gs)
+    snapshots = [reference.state.to_dict()]
+    while reference.step():
+        snapshots.append(reference.state.to_dict())
+    assert snapshots[-1] == gs.to_dict()
+
+    replay = Replay.from_game(gs, keyframe_interval=16)
+    for turn in (100, 7, 120, 33, 0, 64, 65):
+        replay.seek(turn)
+        assert replay.position == turn
+        assert replay.state.to_dict() == snapshots[turn]
+    # 65 -> 60 attraversa il keyframe a 64, dove lo stack di undo è vuoto
+    for turn in range(64, 59, -1):
+        assert replay.step_back()
+        assert replay.state.to_dict() == snapshots[turn]
+
+def test_playback_speed(played_game):
+    replay = Replay.from_game(played_game(20, seed=8, turns=40, place=0.5), speed=10.0)
+    replay.play()
+    assert replay.update(0.25) == 2
+    assert replay.update(0.05) == 1  # 0.5 + 0.5 azioni accumulate
+    replay.speed = -20.0
+    assert replay.update(0.1) == 2 and replay.position == 1
+    replay.speed = 1000.0
+    replay.update(1.0)
+    assert replay.at_end and not replay.playing
@@ -0,0 +1,65 @@
+import os, sys, numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from save_load import save_game, load_game, convert_saves, read_index, rebuild_index, INDEX_NAME
+
+def test_binary_round_trip(tmp_path, played_game):
+    gs = played_game(24, seed=5, turns=60, place=0.6)
+    path = tmp_path / 'game.fwb'
+    save_game(gs, path)
+    loaded = load_game(path)
+    assert isinstance(loaded.terrain, np.memmap)
+    assert loaded.to_dict() == gs.to_dict()
+    assert [loaded.income(0), loaded.income(1)] == [gs.income(0), gs.income(1)]
+
+def test_save_over_loaded_binary(tmp_path, played_game):
+    # il terreno caricato è mappato sul file che si sta sovrascrivendo
+    path = tmp_path / 'game.fwb'
+    save_game(played_game(24, seed=5, turns=60, place=0.6), path, index=False)
+    gs = load_game(path)
+    gs.pass_turn(gs.current_player)
+    save_game(gs, path, index=False)
+    assert load_game(path).to_dict() == gs.to_dict()
+    assert [p.name for p in tmp_path.iterdir()] == ['game.fwb']
+
+def test_convert_json(tmp_path, played_game):
+    gs = played_game(24, seed=5, turns=60, place=0.6)
+    src = tmp_path / 'fortwars_20240101_000000.json'
+    save_game(gs, src)
+    (target,) = convert_saves([src])
+    assert target.suffix == '.fwb'
+    assert target.stat().st_size < src.stat().st_size
+    assert load_game(target).to_dict() == load_game(src).to_dict()
+
+def test_save_index(tmp_path, played_game):
+    gs = played_game(24, seed=5, turns=60, place=0.6)
+    save_game(gs, tmp_path / 'fortwars_a.json')
+    save_game(gs, tmp_path / 'fortwars_b.fwb')
+    gs.pass_turn(gs.current_player)
+    save_game(gs, tmp_path / 'fortwars_a.json')  # risalvato: vale l'ultima riga
+    entries = read_index(tmp_path)
+    assert [e['file'] for e in entries] == ['fortwars_a.json', 'fortwars_b.fwb']
+    assert entries[0]['turn_count'] == gs.turn_count == entries[1]['turn_count'] + 1
+    assert entries[1]['forts'] == len(gs.forts) and entries[1]['n'] == 24
+    # i file convertiti e cancellati spariscono dall'indice
+    convert_saves([tmp_path / 'fortwars_a.json'], remove=True)
+    assert sorted(e['file'] for e in read_index(tmp_path)) == ['fortwars_a.fwb', 'fortwars_b.fwb']
+    (tmp_path / INDEX_NAME).unlink()
+    rebuilt = rebuild_index(tmp_path)
+    assert sorted(e['file'] for e in rebuilt) == ['fortwars_a.fwb', 'fortwars_b.fwb']
+
+def test_rebuild_index_skips_broken_and_keeps_appends(tmp_path, monkeypatch, played_game):
+    import save_load
+    gs = played_game(24, seed=5, turns=60, place=0.6)
+    save_game(gs, tmp_path / 'fortwars_a.json', index=False)
+    (tmp_path / 'fortwars_broken.json').write_text('{"terrain": [[0.1,')  # troncato
+    # un salvataggio che arriva mentre l'indice si ricostruisce non va perso
+    load = save_load.load_game
+    def load_and_save(path, *args):
+        if not (tmp_path / 'fortwars_c.fwb').exists():
+            save_game(gs, tmp_path / 'fortwars_c.fwb')
+        return load(path, *args)
+    monkeypatch.setattr(save_load, 'load_game', load_and_save)
+    entries = rebuild_index(tmp_path)
+    assert sorted(e['file'] for e in entries) == ['fortwars_a.json', 'fortwars_c.fwb']
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        'fortwars_a.json', 'fortwars_broken.json', 'fortwars_c.fwb', INDEX_NAME]
@@ -0,0 +1,76 @@
+import asyncio, os, sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+import protocol as P
+from client import FortWarsClient
+from server import FortWarsServer
+from tournament import AGENTS
+
+async def _with_server(tmp_path, body, **kwargs):
+    server = FortWarsServer(**kwargs)
+    path = str(tmp_path / 'fw.sock')
+    listener = await server.start_unix(path)
+    try:
+        return await body(server, lambda: FortWarsClient.connect_unix(path))
+    finally:
+        listener.close()
+        await asyncio.sleep(0.01)  # lascia chiudere gli handler delle connessioni
+
+def test_remote_match_mirrors_server(tmp_path):
+    async def body(server, connect):
+        a, b = await connect(), await connect()
+        results = await asyncio.gather(a.play(AGENTS['random'], n=12, k=1, seed=5),
+                                       b.play(AGENTS['greedy'], n=12, k=1))
+        assert a.gs.history == b.gs.history and a.gs.scores == b.gs.scores
+        assert server.finished == 1 and not server.matches
+        await a.close(); await b.close()
+        return results
+    r0, r1 = asyncio.run(_with_server(tmp_path, body))
+    assert r0['reason'] == r1['reason'] == P.OVER
+    assert r0['winner'] == r1['winner'] and (r0['player'], r1['player']) == (0, 1)
+
+def test_timeout_passes_and_disconnect_ends(tmp_path):
+    async def body(server, connect):
+        a, b = await connect(), await connect()
+        await asyncio.gather(a.join(10, 1, seed=1), b.join(10, 1))
+        assert await a.wait_turn()  # a non muove: allo scadere il server passa per lui
+        assert await b.wait_turn()
+        assert b.gs.history == [{'type': 'pass', 'player': 0}] and server.timeouts == 1
+        await b.close()
+        assert not await a.wait_turn()
+        assert a.result['reason'] == P.DISCONNECTED and a.result['winner'] == 0
+        await a.close()
+    asyncio.run(_with_server(tmp_path, body, timeout=0.05))
+
+def test_join_size_limit(tmp_path):
+    # START alla dimensione massima accettata deve stare in un messaggio
+    assert P._START.size + 4 * P.MAX_N ** 2 <= P.MAX_MESSAGE
+    async def body(server, connect):
+        a = await connect()
+        try:
+            await a.join(P.MAX_N + 1, 1)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('JOIN oltre MAX_N accettato')
+        await a.close()
+    asyncio.run(_with_server(tmp_path, body))
+
+def test_agent_not_called_after_end(tmp_path):
+    # lo STATE finale arriva prima di END: non deve sembrare il proprio turno
+    calls = []
+    def agent(gs, rng):
+        calls.append(gs.turn_count)
+        assert not gs.is_over()
+        return AGENTS['random'](gs, rng)
+    async def body(server, connect):
+        reasons = []
+        for max_turns in (3, 10_000):
+            server.max_turns, server.moves = max_turns, 0
+            calls.clear()
+            a, b = await connect(), await connect()
+            r0, _ = await asyncio.gather(a.play(agent, n=12, k=2, seed=3), b.play(agent, n=12, k=2))
+            assert max(calls) < max_turns and len(calls) == server.moves
+            reasons.append(r0['reason'])
+            await a.close(); await b.close()
+        return reasons
+    assert asyncio.run(_with_server(tmp_path, body)) == [P.MAX_TURNS, P.OVER]
@@ -0,0 +1,24 @@
+import os, sys, numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from terrain import generate_terrain, generate_terrain_batch
+
+def test_batch_matches_single_maps():
+    for method in ('direct', 'fft'):
+        batch = generate_terrain_batch(20, [1, 2, 3], smooth_steps=4, method=method)
+        assert batch.dtype == np.float32
+        for b, seed in enumerate([1, 2, 3]):
+            assert np.array_equal(batch[b], generate_terrain(20, 4, seed=seed, method=method))
+
+def test_fft_matches_direct():
+    direct = generate_terrain_batch(40, [7], smooth_steps=50, method='direct')
+    fft = generate_terrain_batch(40, [7], smooth_steps=50, method='fft')
+    assert np.abs(direct - fft).max() < 1e-5
+
+def test_cache(tmp_path):
+    first = generate_terrain(16, seed=9, cache_dir=tmp_path)
+    assert (tmp_path / 'terrain_16_4_direct_9.npy').exists()
+    assert np.array_equal(generate_terrain(16, seed=9, cache_dir=tmp_path), first)
+    # la mappa 'direct' in cache non viene restituita per una richiesta 'fft'
+    fft = generate_terrain(16, seed=9, method='fft', cache_dir=tmp_path)
+    assert (tmp_path / 'terrain_16_4_fft_9.npy').exists()
+    assert np.array_equal(fft, generate_terrain_batch(16, [9], method='fft')[0])
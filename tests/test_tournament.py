@@ -0,0 +1,44 @@
+import os, sys, json, multiprocessing, pytest
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+import tournament
+
+def test_results_stream_and_resume(tmp_path):
+    out = str(tmp_path / 'results.jsonl')
+    assert tournament.run_tournament(['random', 'greedy'], out, n=12, maps=2, games=2, workers=2) == 8
+    # una riga troncata (crash a metà scrittura) viene scartata e la partita rigiocata
+    with open(out, 'rb+') as f:
+        f.truncate(os.path.getsize(out) - 5)
+    assert tournament.run_tournament(['random', 'greedy'], out, n=12, maps=2, games=2, workers=2) == 1
+    with open(out) as f:
+        results = [json.loads(line) for line in f]
+    assert sorted(r['id'] for r in results) == list(range(8))
+    assert all(r['winner'] in (0, 1, -1) for r in results)
+
+# l'agente registrato qui è visibile ai worker solo se vengono creati con fork
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork', reason='serve fork')
+def test_worker_crash_is_recorded(tmp_path):
+    tournament.AGENTS['crash'] = lambda gs, rng: os._exit(1)
+    try:
+        out = str(tmp_path / 'results.jsonl')
+        tournament.run_tournament(['greedy', 'crash'], out, n=8, maps=1, workers=2, max_retries=1)
+        with open(out) as f:
+            results = [json.loads(line) for line in f]
+        assert len(results) == 2 and all(r['error'] == 'worker crashed' for r in results)
+    finally:
+        del tournament.AGENTS['crash']
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork', reason='serve fork')
+def test_worker_crash_spares_other_games(tmp_path):
+    # le partite innocenti perse con il pool rotto vengono rigiocate, non segnate come crash
+    tournament.AGENTS['crash'] = lambda gs, rng: os._exit(1)
+    try:
+        out = str(tmp_path / 'results.jsonl')
+        tournament.run_tournament(['random', 'greedy', 'crash'], out, n=8, maps=6, workers=4,
+                                  max_retries=2, chunk=2)
+        with open(out) as f:
+            results = [json.loads(line) for line in f]
+        assert sorted(r['id'] for r in results) == list(range(36))
+        for r in results:
+            assert ('error' in r) == ('crash' in (r['p0'], r['p1']))
+    finally:
+        del tournament.AGENTS['crash']
@@ -0,0 +1,22 @@
+import os, sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from transposition import TranspositionTable, LOWER
+
+def test_depth_preferred_replacement():
+    tt = TranspositionTable(capacity=8, policy='depth')
+    assert tt.lookup(3) is None
+    assert tt.store(3, 1.5, depth=4, flag=LOWER, move=12)
+    assert tt.lookup(3) == (1.5, 4, LOWER, 12)
+    # 11 collide con 3: una ricerca meno profonda non lo sostituisce
+    assert not tt.store(11, 2.0, depth=2)
+    assert tt.lookup(11) is None and tt.lookup(3).depth == 4
+    tt.new_search()
+    assert tt.store(11, 2.0, depth=2)
+    assert tt.lookup(3) is None and tt.lookup(11).value == 2.0
+    assert (tt.hits, tt.rejected) == (3, 1)
+
+def test_always_replace():
+    tt = TranspositionTable(capacity=4, policy='always')
+    tt.store(1, 1.0, depth=9)
+    tt.store(5, 2.0, depth=0)
+    assert tt.lookup(1) is None and tt.lookup(5).value == 2.0 and len(tt) == 1
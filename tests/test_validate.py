@@ -0,0 +1,34 @@
+import json, os, sys, numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from save_load import save_game
+from validate import iter_saves, validate_game, validate_saves
+
+def test_validate_detects_divergences(tmp_path, played_game):
+    save_game(played_game(20, seed=1), tmp_path / 'fortwars_ok.fwb')
+    gs = played_game(20, seed=2)
+    save_game(gs, tmp_path / 'fortwars_scores.json')
+    data = json.loads((tmp_path / 'fortwars_scores.json').read_text())
+    data['scores'][0] += 1.0
+    (tmp_path / 'fortwars_scores.json').write_text(json.dumps(data))
+    data = gs.to_dict()
+    data['terrain'] = np.asarray(data['terrain']).tolist()
+    first = next(i for i, a in enumerate(data['history']) if a['type'] == 'place')
+    data['history'][first]['x'] = (data['history'][first]['x'] + 5) % 20
+    (tmp_path / 'fortwars_moved.json').write_text(json.dumps(data))
+
+    assert validate_game(str(tmp_path / 'fortwars_ok.fwb'))['ok']
+    scores = validate_game(str(tmp_path / 'fortwars_scores.json'))
+    assert not scores['ok'] and 'scores' in scores['final'] and 'first_mismatch' not in scores
+    moved = validate_game(str(tmp_path / 'fortwars_moved.json'))
+    assert not moved['ok'] and moved['first_mismatch']['index'] == first
+
+    # un'azione malformata diventa un errore di quella partita, non ferma la scansione
+    del data['history'][first]['x']
+    (tmp_path / 'fortwars_broken.json').write_text(json.dumps(data))
+
+    results = list(validate_saves(iter_saves(str(tmp_path)), workers=2, in_flight=2))
+    assert sorted((os.path.basename(r['file']), r['ok']) for r in results) == [
+        ('fortwars_broken.json', False), ('fortwars_moved.json', False),
+        ('fortwars_ok.fwb', True), ('fortwars_scores.json', False)]
+    broken = next(r for r in results if r['file'].endswith('broken.json'))
+    assert 'KeyError' in broken['error']
@@ -0,0 +1,58 @@
+import os, sys, numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from game import GameState, WATER_LEVEL
+from vec_game import VecGameState
+
+def test_parity_with_game_state():
+    B, n = 16, 8
+    rng = np.random.default_rng(1)
+    # k=0 permette forti adiacenti, così il bonus di produzione viene esercitato
+    for k in (0, 2):
+        vec = VecGameState(B, n, k=k, auto_reset=False)
+        terrains = rng.random((B, n, n)).astype(np.float32)
+        vec.reset(terrains=terrains)
+        games = [GameState(terrains[b].copy(), k=k) for b in range(B)]
+        for _ in range(80):
+            legal = vec.legal_mask().reshape(B, -1)
+            actions = rng.integers(0, n * n + 1, size=B)
+            pick = rng.random(B) < 0.6
+            for b in np.flatnonzero(pick & legal.any(axis=1)):
+                actions[b] = rng.choice(np.flatnonzero(legal[b]))
+            reward, done, info = vec.step(actions)
+            for b, gs in enumerate(games):
+                p = gs.current_player
+                x, y = divmod(int(actions[b]), n)
+                placed = actions[b] < n * n and gs.place_fort(p, x, y)
+                if not placed:
+                    gs.pass_turn(p)
+                assert placed == info['valid'][b]
+                assert gs.credits == vec.credits[b].tolist()
+                assert gs.scores == vec.scores[b].tolist()
+                assert gs.current_player == vec.current_player[b]
+                assert gs.turn_count == vec.turn_count[b]
+                assert gs.is_over() == done[b]
+                assert (gs.legal_mask(0) == (vec.free[b] & (vec.credits[b, 0] >= 800))).all()
+
+def test_auto_reset():
+    vec = VecGameState(4, 3, k=1, seed=0)
+    for _ in range(50):
+        _, done, info = vec.step(np.full(4, vec.pass_action))
+    # con solo pass nessuna partita finisce
+    assert not done.any() and (vec.turn_count == 50).all()
+    vec.free[:] = False
+    vec.free_count[:] = 0
+    _, done, _ = vec.step(np.full(4, vec.pass_action))
+    assert done.all()
+    assert (vec.turn_count == 0).all() and (vec.free_count > 0).any()
+
+def test_terrain_bank_reset():
+    bank = np.random.default_rng(2).random((3, 6, 6)).astype(np.float32)
+    vec = VecGameState(8, 6, k=1, seed=0, terrain_bank=bank)
+    vec.free[:] = False
+    vec.free_count[:] = 0
+    _, done, _ = vec.step(np.full(8, vec.pass_action))
+    assert done.all()
+    for b in range(8):
+        (i,) = [i for i in range(3) if (vec.terrain[b] == bank[i]).all()]
+        assert (vec.free[b] == (bank[i] >= WATER_LEVEL)).all() and vec.free_count[b] == vec.free[b].sum()
+    assert VecGameState(2, 6, seed=0, terrain_bank=4).terrain_bank.shape == (4, 6, 6)
@@ -0,0 +1,225 @@
+"""
+Torneo headless round-robin tra agenti su un ProcessPoolExecutor.
+
+    python tournament.py --agents random greedy --maps 8 --n 32 --out results.jsonl
+
+I terreni vengono generati una volta e messi in shared memory: i worker li leggono
+senza ricevere array serializzati. Ogni risultato viene scritto come riga JSON appena
+la partita finisce (con --chunk > 1, appena finisce il blocco); rilanciando con lo stesso --out le partite già registrate vengono
+saltate, quindi un crash non fa perdere il lavoro fatto.
+"""
+import argparse, itertools, json, os, sys, time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from game import GameState
+from terrain import generate_terrain_batch
+from bot import HeuristicBot
+
+Move = Optional[Tuple[int, int]]  # None = passa
+
+# ---------- Agenti -----------------------------------------------------------
+def random_agent(gs: GameState, rng: np.random.Generator) -> Move:
+    """Piazza su una casella libera a caso; passa il 20% delle volte."""
+    xs, ys = np.nonzero(gs.legal_mask(gs.current_player))
+    if not len(xs) or rng.random() < 0.2:
+        return None
+    i = rng.integers(len(xs))
+    return int(xs[i]), int(ys[i])
+
+def greedy_agent(gs: GameState, rng: np.random.Generator) -> Move:
+    """Piazza sulla casella libera più alta (massimo guadagno di punteggio immediato)."""
+    mask = gs.legal_mask(gs.current_player)
+    if not mask.any():
+        return None
+    cell = int(np.argmax(np.where(mask, gs.terrain, -1.0)))
+    return divmod(cell, gs.n)
+
+AGENTS: Dict[str, Callable[[GameState, np.random.Generator], Move]] = {
+    'random': random_agent,
+    'greedy': greedy_agent,
+    'heuristic': HeuristicBot(),  # valuta tutte le caselle, vedi bot.py
+}
+
+# ---------- Worker -----------------------------------------------------------
+_terrains: Optional[np.ndarray] = None
+_status: Optional[np.ndarray] = None
+_shm: List[shared_memory.SharedMemory] = []
+
+# stato di ogni partita in shared memory: dopo un crash del pool dice quali erano in corso
+PENDING, RUNNING, DONE = 0, 1, 2
+
+def _attach(terrain_name: str, shape: Tuple[int, ...], status_name: str, games: int):
+    global _terrains, _status
+    _shm[:] = [shared_memory.SharedMemory(name=terrain_name),
+               shared_memory.SharedMemory(name=status_name)]
+    _terrains = np.ndarray(shape, dtype=np.float32, buffer=_shm[0].buf)
+    _status = np.ndarray((games,), dtype=np.int8, buffer=_shm[1].buf)
+
+def play_match(terrain: np.ndarray, k: int, agents: Tuple[str, str], seed: int,
+               max_turns: int) -> Dict:
+    gs = GameState(terrain, k=k)
+    rng = np.random.default_rng(seed)
+    players = [AGENTS[name] for name in agents]
+    while not gs.is_over() and gs.turn_count < max_turns:
+        p = gs.current_player
+        move = players[p](gs, rng)
+        if move is None or not gs.place_fort(p, *move):
+            gs.pass_turn(p)
+    return {'winner': gs.winner(), 'scores': gs.scores, 'turn_count': gs.turn_count}
+
+def _run_chunk(matches: List[Dict], k: int, max_turns: int) -> List[Dict]:
+    results = []
+    for m in matches:
+        _status[m['id']] = RUNNING
+        res = play_match(_terrains[m['map']], k, (m['p0'], m['p1']), m['seed'], max_turns)
+        _status[m['id']] = DONE
+        results.append({**m, **res})
+    return results
+
+# ---------- Torneo -----------------------------------------------------------
+def schedule(agents: List[str], maps: int, games: int, seed: int) -> List[Dict]:
+    """Ogni coppia ordinata di agenti diversi gioca `games` partite su ogni mappa."""
+    matches = []
+    for p0, p1 in itertools.permutations(agents, 2):
+        for m in range(maps):
+            for g in range(games):
+                matches.append({'id': len(matches), 'map': m, 'p0': p0, 'p1': p1,
+                                'seed': seed * 1_000_003 + len(matches)})
+    return matches
+
+def _completed(out: str) -> set:
+    """Id delle partite già nel file; una riga finale troncata da un crash viene rimossa."""
+    done = set()
+    if not os.path.exists(out):
+        return done
+    with open(out, 'rb+') as f:
+        data = f.read()
+        end = data.rfind(b'\n') + 1
+        if end < len(data):
+            f.truncate(end)
+    for line in data[:end].splitlines():
+        done.add(json.loads(line)['id'])
+    return done
+
+def _play_round(todo: List[Dict], f, status: np.ndarray, initargs: Tuple, k: int,
+                max_turns: int, workers: int | None, chunk: int) -> Tuple[int, List[Dict], List[Dict]]:
+    """
+    Gioca `todo` su un pool nuovo scrivendo ogni task appena finisce. Ritorna
+    (scritte, sospette, da rifare): se il pool si rompe, le partite in corso in quel
+    momento sono sospette; le altre rimaste senza risultato vanno solo rigiocate.
+    """
+    written = 0
+    lost = []
+    status[[m['id'] for m in todo]] = PENDING
+    with ProcessPoolExecutor(workers, initializer=_attach, initargs=initargs) as pool:
+        futures = {pool.submit(_run_chunk, todo[i:i + chunk], k, max_turns): todo[i:i + chunk]
+                   for i in range(0, len(todo), chunk)}
+        for fut in as_completed(futures):
+            try:
+                results = fut.result()
+            except BrokenProcessPool:
+                lost.extend(futures[fut])
+                continue
+            except Exception as exc:
+                results = [{**m, 'error': repr(exc)} for m in futures[fut]]
+            for r in results:
+                f.write(json.dumps(r, separators=(',', ':')) + '\n')
+            f.flush()
+            written += len(results)
+    suspects = [m for m in lost if status[m['id']] == RUNNING]
+    if not suspects:  # il pool si è rotto prima di iniziare (es. nell'initializer)
+        return written, lost, []
+    return written, suspects, [m for m in lost if status[m['id']] != RUNNING]
+
+def run_tournament(agents: List[str], out: str, n: int = 18, k: int = 2, maps: int = 4,
+                   games: int = 1, workers: int | None = None, seed: int = 0,
+                   max_turns: int = 10_000, chunk: int = 1, max_retries: int = 2) -> int:
+    """
+    Gioca le partite mancanti in `out` e ritorna quante ne ha scritte. Se un worker
+    muore, ogni partita che era in corso viene rigiocata da sola in un pool nuovo, fino
+    a `max_retries` volte, prima di essere registrata come 'worker crashed'.
+    """
+    for name in agents:
+        if name not in AGENTS:
+            raise ValueError(f'agente sconosciuto: {name} (disponibili: {", ".join(AGENTS)})')
+    matches = schedule(agents, maps, games, seed)
+    done = _completed(out)
+    todo = [m for m in matches if m['id'] not in done]
+    if not todo:
+        return 0
+
+    shape = (maps, n, n)
+    shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * 4)
+    status_shm = shared_memory.SharedMemory(create=True, size=len(matches))
+    initargs = (shm.name, shape, status_shm.name, len(matches))
+    written = 0
+    terrains = status = None
+    try:
+        terrains = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+        status = np.ndarray((len(matches),), dtype=np.int8, buffer=status_shm.buf)
+        generate_terrain_batch(n, [seed * 7919 + m for m in range(maps)], out=terrains)
+        with open(out, 'a', encoding='utf-8') as f:
+            while todo:
+                count, suspects, todo = _play_round(todo, f, status, initargs, k, max_turns,
+                                                    workers, chunk)
+                written += count
+                for m in suspects:
+                    for _ in range(max_retries):
+                        count, crashed, _ = _play_round([m], f, status, initargs, k, max_turns, 1, 1)
+                        written += count
+                        if not crashed:
+                            break
+                    else:
+                        f.write(json.dumps({**m, 'error': 'worker crashed'}, separators=(',', ':')) + '\n')
+                        f.flush()
+                        written += 1
+    finally:
+        del terrains, status
+        for block in (shm, status_shm):
+            block.close()
+            block.unlink()
+    return written
+
+def summary(out: str) -> Dict[str, Dict[str, int]]:
+    """Vittorie, sconfitte, pareggi per agente, letti dal file dei risultati."""
+    table: Dict[str, Dict[str, int]] = {}
+    with open(out, encoding='utf-8') as f:
+        for line in f:
+            r = json.loads(line)
+            if 'error' in r or r['winner'] is None:
+                continue
+            for seat, name in enumerate((r['p0'], r['p1'])):
+                row = table.setdefault(name, {'win': 0, 'loss': 0, 'draw': 0})
+                if r['winner'] == -1:
+                    row['draw'] += 1
+                else:
+                    row['win' if r['winner'] == seat else 'loss'] += 1
+    return table
+
+def main():
+    parser = argparse.ArgumentParser(description='Torneo Fort Wars headless')
+    parser.add_argument('--agents', nargs='+', default=list(AGENTS))
+    parser.add_argument('--out', default='results.jsonl')
+    parser.add_argument('--n', type=int, default=18)
+    parser.add_argument('--k', type=int, default=2)
+    parser.add_argument('--maps', type=int, default=4)
+    parser.add_argument('--games', type=int, default=1, help='partite per coppia e mappa')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-turns', type=int, default=10_000)
+    parser.add_argument('--chunk', type=int, default=1,
+                        help='partite per task (di più: meno overhead, risultati scritti a blocchi)')
+    args = parser.parse_args()
+    start = time.perf_counter()
+    written = run_tournament(args.agents, args.out, args.n, args.k, args.maps, args.games,
+                             args.workers, args.seed, args.max_turns, args.chunk)
+    elapsed = time.perf_counter() - start
+    print(f'{written} partite in {elapsed:.1f}s ({written / max(elapsed, 1e-9):.1f}/s)', file=sys.stderr)
+    for name, row in sorted(summary(args.out).items()):
+        print(f"{name:>12}  W {row['win']:5d}  L {row['loss']:5d}  D {row['draw']:5d}")
+
+if __name__ == '__main__':
+    main()
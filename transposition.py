@@ -0,0 +1,84 @@
+from __future__ import annotations
+from typing import Callable, NamedTuple, Optional, Union
+import numpy as np
+
+EXACT, LOWER, UPPER = 0, 1, 2  # tipo di valore: esatto, limite inferiore (cutoff beta), superiore
+_EMPTY = -1
+
+# policy(vecchia_depth, vecchia_generazione, nuova_depth, generazione_corrente) -> sostituire?
+ReplacePolicy = Callable[[int, int, int, int], bool]
+
+def always_replace(old_depth: int, old_gen: int, depth: int, gen: int) -> bool:
+    return True
+
+def depth_preferred(old_depth: int, old_gen: int, depth: int, gen: int) -> bool:
+    """Tiene la ricerca più profonda, ma le voci di ricerche precedenti cedono sempre."""
+    return old_gen != gen or depth >= old_depth
+
+POLICIES = {'always': always_replace, 'depth': depth_preferred}
+
+
+class TTEntry(NamedTuple):
+    value: float
+    depth: int
+    flag: int
+    move: int  # indice di casella x*n+y, n*n per il pass, -1 se sconosciuta
+
+
+class TranspositionTable:
+    """
+    Tabella di trasposizione a dimensione fissa, indicizzata da GameState.zobrist.
+    Gli array sono preallocati: nessuna allocazione per store/lookup. La stessa istanza
+    può essere condivisa tra più agenti dello stesso processo. new_search() fa
+    invecchiare le voci esistenti, che la policy 'depth' sostituisce per prime.
+    """
+    def __init__(self, capacity: int = 1 << 20, policy: Union[str, ReplacePolicy] = 'depth'):
+        if isinstance(policy, str):
+            if policy not in POLICIES:
+                raise ValueError(f'policy sconosciuta: {policy} (disponibili: {", ".join(POLICIES)})')
+            policy = POLICIES[policy]
+        self.capacity = capacity
+        self.policy = policy
+        self._keys = np.zeros(capacity, dtype=np.uint64)
+        self._values = np.zeros(capacity, dtype=np.float64)
+        self._depths = np.zeros(capacity, dtype=np.int32)
+        self._flags = np.full(capacity, _EMPTY, dtype=np.int8)
+        self._moves = np.zeros(capacity, dtype=np.int32)
+        self._gens = np.zeros(capacity, dtype=np.uint16)
+        self.generation = 0
+        self.hits = self.misses = self.stores = self.rejected = 0
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._flags != _EMPTY))
+
+    def new_search(self):
+        self.generation = (self.generation + 1) & 0xFFFF
+
+    def clear(self):
+        self._flags[:] = _EMPTY
+        self.hits = self.misses = self.stores = self.rejected = 0
+
+    def lookup(self, key: int) -> Optional[TTEntry]:
+        i = key % self.capacity
+        if self._flags[i] == _EMPTY or int(self._keys[i]) != key:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return TTEntry(float(self._values[i]), int(self._depths[i]), int(self._flags[i]),
+                       int(self._moves[i]))
+
+    def store(self, key: int, value: float, depth: int, flag: int = EXACT, move: int = -1) -> bool:
+        """Salva la voce se lo slot è libero, ha la stessa chiave o la policy lo concede."""
+        i = key % self.capacity
+        if (self._flags[i] != _EMPTY and int(self._keys[i]) != key
+                and not self.policy(int(self._depths[i]), int(self._gens[i]), depth, self.generation)):
+            self.rejected += 1
+            return False
+        self._keys[i] = key
+        self._values[i] = value
+        self._depths[i] = depth
+        self._flags[i] = flag
+        self._moves[i] = move
+        self._gens[i] = self.generation
+        self.stores += 1
+        return True
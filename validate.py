@@ -0,0 +1,143 @@
+"""
+Validazione headless di un archivio di salvataggi: ogni partita viene rigiocata dal
+suo stato iniziale (terreno e k) riapplicando `history` con le regole correnti di
+game.py, e lo stato finale viene confrontato con quello salvato.
+
+    python validate.py saves/ --workers 8 --out report.jsonl
+
+Per ogni partita divergente il report indica la prima azione che non torna: una
+mossa illegale, un'azione del giocatore sbagliato o un forte diverso da quello salvato
+(la tabella dei forti registra giocatore, casella e turno di ognuno). Se tutte le
+azioni tornano ma lo stato finale no, la divergenza è nei crediti o nel punteggio.
+Esce con codice 1 se almeno una partita diverge.
+"""
+import argparse, json, math, os, sys, time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+from game import GameState
+from replay import Replay
+from save_load import load_game, SAVE_PATTERNS
+
+def iter_saves(root: str, patterns=SAVE_PATTERNS) -> Iterator[str]:
+    """Path dei salvataggi sotto `root` (ricorsivo), in ordine, senza elencarli tutti prima."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if any(Path(name).match(p) for p in patterns):
+                yield os.path.join(dirpath, name)
+
+def _fort_tuple(forts, i: int):
+    f = forts[i]
+    return [int(f['player']), int(f['x']), int(f['y']), int(f['turn'])]
+
+def _final_diffs(saved: GameState, sim: GameState) -> Dict[str, List]:
+    diffs = {}
+    if list(saved.credits) != list(sim.credits):
+        diffs['credits'] = [list(saved.credits), list(sim.credits)]
+    for field in ('turn_count', 'current_player'):
+        if getattr(saved, field) != getattr(sim, field):
+            diffs[field] = [getattr(saved, field), getattr(sim, field)]
+    if not all(math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9) for a, b in zip(saved.scores, sim.scores)):
+        diffs['scores'] = [list(saved.scores), list(sim.scores)]
+    if len(saved.forts) != len(sim.forts):
+        diffs['forts'] = [len(saved.forts), len(sim.forts)]
+    if saved.winner() != sim.winner():
+        diffs['winner'] = [saved.winner(), sim.winner()]
+    return diffs
+
+def _replay(saved: GameState, result: Dict):
+    """Rigioca `saved` e scrive in `result` la prima azione divergente o le differenze finali."""
+    # le regole di replay sono quelle di Replay; senza keyframe, si va solo avanti
+    replay = Replay.from_game(saved, keyframe_interval=len(saved.history) + 1)
+    sim = replay.state
+    result['actions'] = len(saved.history)
+    mismatch: Optional[Dict] = None
+    for i, action in enumerate(saved.history):
+        p = action['player']
+        fort = len(sim.forts)
+        if p != sim.current_player:
+            mismatch = {'reason': f'tocca a {sim.current_player}, non a {p}'}
+        else:
+            try:
+                replay.step()
+            except ValueError:
+                mismatch = {'reason': 'piazzamento non valido'}
+        if mismatch is None and action['type'] == 'place' and (
+                fort >= len(saved.forts) or _fort_tuple(saved.forts, fort) != _fort_tuple(sim.forts, fort)):
+            mismatch = {'reason': 'forte diverso dal salvato',
+                        'saved': _fort_tuple(saved.forts, fort) if fort < len(saved.forts) else None,
+                        'simulated': _fort_tuple(sim.forts, fort)}
+        if mismatch is not None:
+            result['first_mismatch'] = {'index': i, 'action': action, 'turn': sim.turn_count,
+                                        'credits': list(sim.credits), **mismatch}
+            break
+    if mismatch is None:
+        diffs = _final_diffs(saved, sim)
+        if diffs:
+            result['final'] = diffs
+        result['ok'] = not diffs
+
+def validate_game(path: str) -> Dict:
+    """Rigioca una partita salvata; ritorna il risultato come dict serializzabile in JSON."""
+    start = time.perf_counter()
+    result: Dict = {'file': path, 'ok': False}
+    try:
+        saved = load_game(path)
+    except Exception as exc:
+        result['error'] = f'caricamento fallito: {exc!r}'
+        return result
+    try:
+        _replay(saved, result)
+    except Exception as exc:
+        # history malformata (es. un piazzamento senza 'x'): si segnala e si va avanti
+        result['ok'] = False
+        result['error'] = f'rigioco fallito: {exc!r}'
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+def validate_saves(paths: Iterator[str], workers: int | None = None,
+                   in_flight: int = 64) -> Iterator[Dict]:
+    """Valida in parallelo, tenendo al più `in_flight` partite in coda: i risultati
+    escono man mano (non nell'ordine dei path) anche con archivi molto grandi."""
+    with ProcessPoolExecutor(workers) as pool:
+        pending = set()
+        for path in paths:
+            pending.add(pool.submit(validate_game, path))
+            if len(pending) >= in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    yield fut.result()
+        for fut in wait(pending).done:
+            yield fut.result()
+
+def main():
+    parser = argparse.ArgumentParser(description='Rigioca e verifica i salvataggi Fort Wars')
+    parser.add_argument('root', help='cartella (o singolo file) dei salvataggi')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--out', type=str, default=None, help='report JSONL (default stdout: solo le divergenze)')
+    parser.add_argument('--pattern', nargs='+', default=list(SAVE_PATTERNS))
+    args = parser.parse_args()
+    paths = [args.root] if os.path.isfile(args.root) else iter_saves(args.root, args.pattern)
+    out = open(args.out, 'w', encoding='utf-8') if args.out else sys.stdout
+    counts = {'ok': 0, 'diverged': 0, 'errors': 0}
+    start = time.perf_counter()
+    try:
+        for res in validate_saves(paths, args.workers, in_flight=4 * (args.workers or os.cpu_count() or 1)):
+            key = 'ok' if res['ok'] else 'errors' if 'error' in res else 'diverged'
+            counts[key] += 1
+            if args.out or not res['ok']:
+                out.write(json.dumps(res, separators=(',', ':')) + '\n')
+    finally:
+        if args.out:
+            out.close()
+    elapsed = time.perf_counter() - start
+    total = sum(counts.values())
+    print(f"{total} partite in {elapsed:.1f}s ({total / max(elapsed, 1e-9):.1f}/s): "
+          f"{counts['ok']} ok, {counts['diverged']} divergenti, {counts['errors']} errori",
+          file=sys.stderr)
+    if counts['diverged'] or counts['errors']:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
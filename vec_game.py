@@ -0,0 +1,178 @@
+from __future__ import annotations
+from typing import Dict, Tuple
+import numpy as np
+from terrain import smooth_terrain
+from game import COST_FORT, START_CREDITS, WATER_LEVEL, ADJACENT_BONUS, production_array
+
+# vicini a distanza 1 (adiacenza per il bonus di produzione)
+_NEIGHBOURS = np.array([(-1, 0), (1, 0), (0, -1), (0, 1)])
+
+
+class VecGameState:
+    """
+    B partite indipendenti tenute come array NumPy impilati.
+    step() applica un vettore di azioni (indice di casella x*n+y oppure n*n per passare)
+    con le stesse regole di GameState.place_fort / pass_turn.
+    Un piazzamento non valido viene trattato come un pass.
+
+    Con `terrain_bank` (array (M, n, n) di mappe già pronte, oppure M per generarne tante
+    all'avvio) i reset senza `terrains` pescano a caso dal banco e copiano, senza
+    generare terreno: conviene a n grandi, dove il blur domina il costo degli auto-reset.
+    """
+    def __init__(self, B: int, n: int, k: int = 2, smooth_steps: int = 4,
+                 seed: int | None = None, auto_reset: bool = True,
+                 terrain_bank: np.ndarray | int | None = None):
+        self.B = B
+        self.n = n
+        self.k = k
+        self.smooth_steps = smooth_steps
+        self.auto_reset = auto_reset
+        self.rng = np.random.default_rng(seed)
+        self.pass_action = n * n
+
+        self.terrain = np.empty((B, n, n), dtype=np.float32)
+        self.free = np.empty((B, n, n), dtype=bool)
+        self.free_count = np.empty(B, dtype=np.int64)
+        # griglie con bordo di 1 cella per leggere i vicini senza controlli sui limiti
+        self.owner = np.empty((B, n + 2, n + 2), dtype=np.int8)  # -1 = vuota
+        self.bonus = np.empty((B, n + 2, n + 2), dtype=bool)     # forte con bonus adiacenza
+        self.credits = np.empty((B, 2), dtype=np.int64)
+        self.scores = np.empty((B, 2), dtype=np.float64)
+        self.income = np.empty((B, 2), dtype=np.int64)  # produzione per turno di ogni giocatore
+        self.turn_count = np.empty(B, dtype=np.int64)
+        self.current_player = np.empty(B, dtype=np.int8)
+
+        d = np.arange(-k, k + 1)
+        dx, dy = np.meshgrid(d, d, indexing='ij')
+        disc = dx**2 + dy**2 <= k**2
+        self._disc_dx = dx[disc]
+        self._disc_dy = dy[disc]
+        self._all = np.arange(B)
+
+        self.terrain_bank = None
+        if terrain_bank is not None:
+            if np.isscalar(terrain_bank):
+                terrain_bank = self._new_terrains(int(terrain_bank))
+            self.terrain_bank = np.asarray(terrain_bank, dtype=np.float32)
+            if self.terrain_bank.ndim != 3 or self.terrain_bank.shape[1:] != (n, n):
+                raise ValueError(f'terrain_bank deve avere forma (M, {n}, {n})')
+            self._bank_free = ~(self.terrain_bank < WATER_LEVEL)
+            self._bank_free_count = np.count_nonzero(self._bank_free, axis=(1, 2))
+        self.reset()
+
+    def _new_terrains(self, m: int) -> np.ndarray:
+        # rumore per tutte le partite da un solo generatore, poi un blur batch:
+        # un default_rng per partita dominava il costo degli auto-reset
+        noise = self.rng.random((m, self.n, self.n), dtype=np.float32)
+        return smooth_terrain(noise, self.smooth_steps)
+
+    # ------------------------------------------------------------------
+    def reset(self, envs: np.ndarray | None = None, terrains: np.ndarray | None = None):
+        """Riporta allo stato iniziale le partite `envs` (tutte se None)."""
+        envs = self._all if envs is None else np.asarray(envs)
+        if terrains is None and self.terrain_bank is not None:
+            pick = self.rng.integers(len(self.terrain_bank), size=len(envs))
+            self.terrain[envs] = self.terrain_bank[pick]
+            self.free[envs] = self._bank_free[pick]
+            self.free_count[envs] = self._bank_free_count[pick]
+        else:
+            self.terrain[envs] = self._new_terrains(len(envs)) if terrains is None else terrains
+            self.free[envs] = ~(self.terrain[envs] < WATER_LEVEL)
+            self.free_count[envs] = np.count_nonzero(self.free[envs], axis=(1, 2))
+        self.owner[envs] = -1
+        self.bonus[envs] = False
+        self.credits[envs] = START_CREDITS
+        self.scores[envs] = 0.0
+        self.income[envs] = 0
+        self.turn_count[envs] = 0
+        self.current_player[envs] = 0
+
+    def legal_mask(self) -> np.ndarray:
+        """Maschera (B, n, n) delle caselle piazzabili dal giocatore di turno."""
+        can_pay = self.credits[self._all, self.current_player] >= COST_FORT
+        return self.free & can_pay[:, None, None]
+
+    def is_over(self) -> np.ndarray:
+        no_credits = (self.credits < COST_FORT).all(axis=1)
+        return (self.free_count == 0) | no_credits
+
+    def winner(self) -> np.ndarray:
+        """0, 1 o -1 (pareggio) per ogni partita, senza controllare che sia finita."""
+        s0, s1 = self.scores[:, 0], self.scores[:, 1]
+        return np.where(s0 > s1, 0, np.where(s1 > s0, 1, -1)).astype(np.int8)
+
+    # ------------------------------------------------------------------
+    def step(self, actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Applica un'azione per partita. Ritorna (reward, done, info): reward è il punteggio
+        guadagnato dal giocatore di turno, info contiene 'valid' (piazzamento riuscito),
+        'winner' e 'scores' finali, letti prima dell'eventuale auto-reset.
+        """
+        n = self.n
+        actions = np.asarray(actions, dtype=np.int64)
+        player = self.current_player.astype(np.int64)
+        cell = np.clip(actions, 0, n * n - 1)
+        x, y = cell // n, cell % n
+        valid = ((actions >= 0) & (actions < n * n)
+                 & (self.credits[self._all, player] >= COST_FORT)
+                 & self.free[self._all, x, y])
+        reward = np.zeros(self.B, dtype=np.float64)
+
+        idx = np.flatnonzero(valid)
+        if len(idx):
+            reward[idx] = self._place(idx, player[idx], x[idx], y[idx])
+        idx = np.flatnonzero(~valid)
+        if len(idx):
+            p = player[idx]
+            self.credits[idx, p] += self.income[idx, p]
+
+        self.turn_count += 1
+        self.current_player ^= 1
+
+        done = self.is_over()
+        info = {'valid': valid, 'winner': self.winner(), 'scores': self.scores.copy()}
+        if self.auto_reset and done.any():
+            self.reset(np.flatnonzero(done))
+        return reward, done, info
+
+    def _place(self, idx, p, x, y) -> np.ndarray:
+        h = self.terrain[idx, x, y].astype(np.float64)
+        gain = h ** 2
+        self.credits[idx, p] -= COST_FORT
+        self.scores[idx, p] += gain
+
+        # bonus di adiacenza: il nuovo forte lo prende se ha un vicino dello stesso
+        # giocatore, i vicini che non l'avevano ancora vengono promossi
+        px, py = x + 1, y + 1
+        nx = px[:, None] + _NEIGHBOURS[:, 0]
+        ny = py[:, None] + _NEIGHBOURS[:, 1]
+        rows = idx[:, None]
+        same = self.owner[rows, nx, ny] == p[:, None]
+        promote = same & ~self.bonus[rows, nx, ny]
+        if promote.any():
+            nb = np.broadcast_to(rows, nx.shape)[promote]
+            nbp = np.broadcast_to(p[:, None], nx.shape)[promote]
+            nbx, nby = nx[promote], ny[promote]
+            base = production_array(self.terrain[nb, nbx - 1, nby - 1].astype(np.float64))
+            extra = (base * ADJACENT_BONUS).astype(np.int64) - base
+            # più vicini della stessa partita possono essere promossi insieme
+            np.add.at(self.income, (nb, nbp), extra)
+            self.bonus[nb, nbx, nby] = True
+
+        has_bonus = same.any(axis=1)
+        prod = production_array(h)
+        prod = np.where(has_bonus, (prod * ADJACENT_BONUS).astype(np.int64), prod)
+        self.income[idx, p] += prod
+        self.owner[idx, px, py] = p
+        self.bonus[idx, px, py] = has_bonus
+
+        # raggio k: le caselle del disco non sono più libere
+        cx = x[:, None] + self._disc_dx
+        cy = y[:, None] + self._disc_dy
+        inside = (cx >= 0) & (cx < self.n) & (cy >= 0) & (cy < self.n)
+        cb = np.broadcast_to(rows, cx.shape)[inside]
+        cx, cy = cx[inside], cy[inside]
+        newly = self.free[cb, cx, cy]
+        self.free_count -= np.bincount(cb[newly], minlength=self.B)
+        self.free[cb, cx, cy] = False
+        return gain